@@ -0,0 +1,266 @@
+"""
+Elaborazione non interattiva di più labirinti.
+
+Accetta file, directory e pattern glob, risolve ogni labirinto (Maze -> Path ->
+output_generation) in un pool di processi e al termine stampa un riepilogo del
+throughput. L'errore su un singolo labirinto non interrompe l'elaborazione degli altri.
+
+Uso: python batch.py indata/ altri/*.png -o Percorsi -j 4
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache import MazeCache
+from maze import Maze
+from path import Path
+from output import output_generation
+from profiling import Profiler
+
+# Estensioni dei file accettati da Maze.load_maze
+SUPPORTED_EXTENSIONS = (".tiff", ".jpeg", ".png", ".json", ".maze")
+
+
+def collect_inputs(patterns):
+
+    """
+    Questa funzione espande la lista di file, directory e pattern glob ricevuta
+    in ingresso nella lista dei file da elaborare.
+
+    Parameters
+    ----------
+    patterns : list
+        Lista di percorsi di file, di directory (di cui si elaborano i file con
+        estensione supportata) o di pattern glob
+
+    Returns
+    -------
+    files : list
+        Lista ordinata e senza duplicati dei file da elaborare.
+    """
+
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in sorted(os.listdir(pattern))]
+            files.extend(f for f in candidates if f.endswith(SUPPORTED_EXTENSIONS))
+        elif os.path.isfile(pattern):
+            # Un file indicato esplicitamente viene sempre elaborato: se il formato non è
+            # supportato, l'errore di load_maze comparirà nel riepilogo
+            files.append(pattern)
+        else:
+            files.extend(sorted(glob.glob(pattern, recursive=True)))
+    # Si eliminano i duplicati mantenendo l'ordine
+    return list(dict.fromkeys(os.path.normpath(f) for f in files))
+
+
+def output_directories(filepaths, output_dir):
+
+    """
+    Questa funzione stabilisce la directory di output di ogni file: sotto output_dir si
+    riproduce la directory del file relativa a quella comune a tutti i file in ingresso.
+    In questo modo labirinti diversi con lo stesso nome in directory diverse (ad esempio
+    a/lab.json e b/lab.json) non sovrascrivono gli uni gli output degli altri, mentre i
+    file di un'unica directory scrivono direttamente in output_dir.
+
+    Parameters
+    ----------
+    filepaths : list
+        Path dei file da elaborare
+
+    output_dir : str
+        Directory in cui salvare i file di output
+
+    Returns
+    -------
+    directories : dict
+        Associa ad ogni file la directory in cui salvarne gli output.
+    """
+
+    if not filepaths:
+        return {}
+    parents = [os.path.dirname(os.path.abspath(f)) for f in filepaths]
+    common = os.path.commonpath(parents)
+    return {f: os.path.normpath(os.path.join(output_dir, os.path.relpath(parent, common)))
+            for f, parent in zip(filepaths, parents)}
+
+
+def solve_files(filepaths, output_dir, solver, cache=None, profile=False, render=None, compact=False):
+
+    """
+    Questa funzione, eseguita in un processo del pool, risolve uno dopo l'altro i
+    labirinti ricevuti e ne genera gli output.
+    Gli eventuali errori vengono catturati e restituiti, in modo che un labirinto
+    non valido non interrompa gli altri.
+
+    Parameters
+    ----------
+    filepaths : list
+        Path dei file da elaborare
+
+    output_dir : str
+        Directory in cui salvare i file di output
+
+    solver : str
+        Algoritmo di ricerca da utilizzare in Path
+
+    cache : MazeCache
+        Cache dei labirinti risolti (opzionale)
+
+    profile : bool
+        Se True, i tempi delle fasi e le statistiche di ricerca vengono salvati nei file JSON
+
+    render : dict
+        Opzioni di disegno passate a output_generation (max_frames, scale, workers, pool, combined, draw)
+
+    compact : bool
+        Se True la ricerca usa la modalità compatta di Path, a bassa occupazione di memoria
+
+    Returns
+    -------
+    results : list
+        Per ogni file, una tupla (filepath, numero di partenze, secondi impiegati, errore),
+        dove errore è None se l'elaborazione è andata a buon fine.
+    """
+
+    results = []
+    for filepath in filepaths:
+        begin = time.perf_counter()
+        try:
+            profiler = Profiler() if profile else None
+            m = Maze(filepath, profiler)
+            p = Path(m, solver=solver, cache=cache, profiler=profiler, compact=compact)
+            output_generation(filepath, p.paths, p.weight, m, output_dir, profiler, **(render or {}))
+            results.append((filepath, len(m.start), time.perf_counter() - begin, None))
+        except Exception as error:
+            results.append((filepath, 0, time.perf_counter() - begin, f"{type(error).__name__}: {error}"))
+    return results
+
+
+def run_batch(filepaths, output_dir="Percorsi", workers=None, solver="auto", cache=None, profile=False, render=None,
+              compact=False):
+
+    """
+    Questa funzione distribuisce i labirinti tra i processi di un ProcessPoolExecutor.
+    Gli output di ogni file vengono salvati nella directory indicata da output_directories.
+    I file con lo stesso nome nella stessa directory (ad esempio lo stesso labirinto in
+    formato .png e .json) producono output con lo stesso nome, per cui vengono elaborati
+    in sequenza dallo stesso processo in modo da non scrivere contemporaneamente sugli stessi file.
+
+    Parameters
+    ----------
+    filepaths : list
+        Path dei file da elaborare
+
+    output_dir : str
+        Directory in cui salvare i file di output
+
+    workers : int
+        Numero di processi da utilizzare (di default il numero di CPU)
+
+    solver : str
+        Algoritmo di ricerca da utilizzare in Path
+
+    cache : MazeCache
+        Cache dei labirinti risolti (opzionale), condivisa tra i processi tramite il disco
+
+    profile : bool
+        Se True, i tempi delle fasi e le statistiche di ricerca vengono salvati nei file JSON
+
+    render : dict
+        Opzioni di disegno passate a output_generation (max_frames, scale, workers, pool, combined, draw)
+
+    compact : bool
+        Se True la ricerca usa la modalità compatta di Path, a bassa occupazione di memoria
+
+    Returns
+    -------
+    results : list
+        Risultati di solve_files per tutti i file, nell'ordine di filepaths.
+    """
+
+    # Si raggruppano i file in base alla directory e al nome degli output che generano
+    directories = output_directories(filepaths, output_dir)
+    groups = {}
+    for filepath in filepaths:
+        filename, _ = os.path.splitext(os.path.basename(filepath))
+        groups.setdefault((directories[filepath], filename), []).append(filepath)
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(solve_files, group, directory, solver, cache, profile, render, compact): group
+                   for (directory, _), group in groups.items()}
+        for future in as_completed(futures):
+            try:
+                group_results = future.result()
+            except Exception as error:
+                # Errore del processo stesso (ad esempio terminato per mancanza di memoria)
+                group_results = [(f, 0, 0.0, f"{type(error).__name__}: {error}") for f in futures[future]]
+            for result in group_results:
+                results[result[0]] = result
+    return [results[filepath] for filepath in filepaths]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="file, directory o pattern glob da elaborare")
+    parser.add_argument("-o", "--output-dir", default="Percorsi",
+                        help="directory dei file di output, in cui si riproducono le sottodirectory dei file in ingresso")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="numero di processi (default: numero di CPU)")
+    parser.add_argument("--solver", default="auto",
+                        choices=["auto", "dijkstra", "astar", "dial", "reverse", "corridor", "bfs"],
+                        help="algoritmo di ricerca (auto: bfs se non ci sono caselle grigie, altrimenti dijkstra)")
+    parser.add_argument("--compact", action="store_true",
+                        help="ricerca a bassa occupazione di memoria, per labirinti molto grandi (solo auto, dijkstra e bfs)")
+    parser.add_argument("--cache-dir", default=None, help="directory della cache dei labirinti risolti")
+    parser.add_argument("--cache-size", type=int, default=256, help="dimensione massima della cache in MiB")
+    parser.add_argument("--no-cache", action="store_true", help="ignora la cache anche se indicata")
+    parser.add_argument("--profile", action="store_true",
+                        help="salva nei file JSON i tempi delle fasi e le statistiche di ricerca")
+    parser.add_argument("--max-frames", type=int, default=None,
+                        help="numero massimo di frame di ogni Gif (più caselle colorate per frame)")
+    parser.add_argument("--scale", type=int, default=1, help="fattore di ingrandimento di immagini e Gif")
+    parser.add_argument("--render-workers", type=int, default=None,
+                        help="numero di percorsi di uno stesso labirinto da disegnare contemporaneamente")
+    parser.add_argument("--render-pool", default="thread", choices=["thread", "process"],
+                        help="tipo di pool utilizzato con --render-workers")
+    parser.add_argument("--combined", action="store_true",
+                        help="un'unica immagine con tutti i percorsi invece di un'immagine e una Gif per partenza")
+    parser.add_argument("--solve-only", action="store_true",
+                        help="salva solo i file JSON dei percorsi, senza immagini e Gif")
+    args = parser.parse_args(argv)
+
+    if args.scale < 1 or (args.max_frames is not None and args.max_frames < 1):
+        parser.error("--scale e --max-frames devono essere interi positivi")
+
+    cache = None
+    if args.cache_dir is not None:
+        cache = MazeCache(args.cache_dir, args.cache_size * 1024 * 1024, enabled=not args.no_cache)
+
+    filepaths = collect_inputs(args.inputs)
+    if not filepaths:
+        parser.error("nessun file da elaborare")
+
+    begin = time.perf_counter()
+    render = {"max_frames": args.max_frames, "scale": args.scale, "workers": args.render_workers,
+              "pool": args.render_pool, "combined": args.combined, "draw": not args.solve_only}
+    results = run_batch(filepaths, args.output_dir, args.workers, args.solver, cache, args.profile, render,
+                        args.compact)
+    elapsed = time.perf_counter() - begin
+
+    failures = [(filepath, error) for filepath, _, _, error in results if error is not None]
+    for filepath, error in failures:
+        print(f"ERRORE {filepath}: {error}", file=sys.stderr)
+
+    solved = len(results) - len(failures)
+    starts = sum(n for _, n, _, error in results if error is None)
+    print(f"Labirinti risolti: {solved}/{len(results)} in {elapsed:.2f} s "
+          f"({solved / elapsed:.2f} labirinti/s, {starts / elapsed:.2f} partenze/s)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Riduzione dei nodi ottenuta contraendo i corridoi del labirinto (Maze.corridors).
+
+Per ogni labirinto si riportano le caselle percorribili, i nodi e gli archi del grafo
+dei corridoi, il tempo di costruzione del grafo e il confronto tra la ricerca di
+Dijkstra sulle caselle ("dijkstra") e quella sul grafo contratto ("corridor"),
+verificando che i pesi dei percorsi coincidano.
+
+Uso: python benchmarks/bench_corridors.py [--size 501] [--seed 0] [--starts 8]
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+from maze import Maze  # noqa: E402
+from path import Path  # noqa: E402
+from generator import KINDS, generate, grid_to_data, write_json  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=501, help="lato dei labirinti sintetici")
+    parser.add_argument("--seed", type=int, default=0, help="seme dei labirinti sintetici")
+    parser.add_argument("--starts", type=int, default=8, help="partenze dei labirinti sintetici")
+    args = parser.parse_args()
+
+    indata = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "indata")
+    files = sorted(glob.glob(os.path.join(indata, "*.json")))
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in KINDS:
+            filepath = os.path.join(tmp, f"{kind}_{args.size}x{args.size}.json")
+            write_json(grid_to_data(*generate(kind, args.size, args.size, args.starts, args.seed)), filepath)
+            files.append(filepath)
+
+        print(f"{'labirinto':<26}{'caselle':>9}{'nodi':>9}{'archi':>9}{'riduzione':>11}"
+              f"{'grafo s':>9}{'dijkstra s':>12}{'corridor s':>12}{'esplorati':>18}")
+        for filepath in files:
+            maze = Maze(filepath)
+            reference = Path(maze)
+            begin = time.perf_counter()
+            graph = maze.corridors()
+            built = time.perf_counter() - begin
+
+            # Il tempo della ricerca sulle caselle viene misurato con la tabella delle adiacenze già pronta
+            begin = time.perf_counter()
+            cells = Path(maze)
+            cells_time = time.perf_counter() - begin
+            begin = time.perf_counter()
+            contracted = Path(maze, solver="corridor")
+            contracted_time = time.perf_counter() - begin
+            if contracted.weight != reference.weight:
+                raise AssertionError(f"Pesi diversi per {filepath}")
+
+            passable = int(np.count_nonzero(maze.maze))
+            nodes = len(graph["nodes"])
+            print(f"{os.path.basename(filepath):<26}{passable:>9}{nodes:>9}{len(graph['targets']):>9}"
+                  f"{1 - nodes / passable:>10.1%}{built:>9.3f}{cells_time:>12.4f}{contracted_time:>12.4f}"
+                  f"{cells.expanded:>9}/{contracted.expanded:<8}")
+
+
+if __name__ == "__main__":
+    main()
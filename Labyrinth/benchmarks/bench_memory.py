@@ -0,0 +1,122 @@
+"""
+Memoria occupata per casella dalle rappresentazioni del labirinto e dello stato della ricerca.
+
+Per ogni dimensione si genera un labirinto con pesi casuali, lo si salva nel formato binario
+.maze e, in un processo separato per ogni caso, si misura con tracemalloc il picco di memoria
+allocata durante il caricamento (Maze) e la ricerca di Dijkstra (Path) in tre modalità:
+
+    - "liste": la rappresentazione originale del progetto, con la matrice come lista di liste
+      di interi e lo stato della ricerca in un dizionario indicizzato da tuple (i, j), con
+      una copia del percorso per ogni elemento della coda
+
+    - "default": Path con la tabella delle adiacenze di Maze e liste Python indicizzate per
+      indice piatto
+
+    - "compact": Path(compact=True), con array tipizzati e caselle adiacenti ricavate dalla
+      matrice, senza tabella delle adiacenze
+
+Il labirinto .maze viene mappato dal file, per cui la matrice (1 byte per casella) non
+compare tra le allocazioni: la sua dimensione è riportata a parte.
+
+Uso: python benchmarks/bench_memory.py --sizes 250 500 1000 --legacy-limit 500
+"""
+import argparse
+import heapq
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from maze import Maze  # noqa: E402
+from path import Path  # noqa: E402
+from generator import generate, grid_to_data, write_json  # noqa: E402
+
+MODES = ("liste", "default", "compact")
+
+
+def legacy_search(grid, start, end):
+
+    """
+    Ricerca di Dijkstra con la rappresentazione originale del progetto: matrice come lista
+    di liste, pesi minimi in un dizionario indicizzato da tuple e percorso copiato in ogni
+    elemento della coda. Serve solo come riferimento per la memoria occupata.
+    """
+
+    height, width = len(grid), len(grid[0])
+    queue = [(0, start, [start])]
+    visited = {start: 0}
+    while queue:
+        curr_weight, curr_pos, path = heapq.heappop(queue)
+        if curr_pos == end:
+            return path, curr_weight
+        i, j = curr_pos
+        for next_pos in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+            x, y = next_pos
+            if 0 <= x < height and 0 <= y < width and grid[x][y] != 0 and next_pos not in visited:
+                new_weight = curr_weight + grid[x][y]
+                visited[next_pos] = new_weight
+                heapq.heappush(queue, (new_weight, next_pos, path + [next_pos]))
+    return None, 0
+
+
+def run_case(filepath, mode):
+
+    """
+    Esegue, nel processo corrente, caricamento e ricerca nella modalità indicata e
+    restituisce il picco di memoria allocata, i secondi impiegati e i pesi trovati.
+    """
+
+    tracemalloc.start()
+    begin = time.perf_counter()
+    m = Maze(filepath)
+    if mode == "liste":
+        grid = m.maze.tolist()
+        weights = [legacy_search(grid, tuple(start), tuple(m.end))[1] for start in m.start]
+    else:
+        weights = Path(m, solver="dijkstra", compact=mode == "compact").weight
+    elapsed = time.perf_counter() - begin
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, elapsed, [int(w) for w in weights]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 500, 1000], help="lati dei labirinti")
+    parser.add_argument("--starts", type=int, default=2, help="partenze dei labirinti")
+    parser.add_argument("--seed", type=int, default=0, help="seme del generatore")
+    parser.add_argument("--legacy-limit", type=int, default=500,
+                        help="lato massimo per cui misurare la modalità \"liste\", molto lenta")
+    args = parser.parse_args()
+
+    print(f"{'lato':>6}  {'modalità':<9}{'picco MiB':>11}{'byte/casella':>14}{'secondi':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            source = os.path.join(tmp, f"weighted_{size}.json")
+            write_json(grid_to_data(*generate("weighted", size, size, args.starts, args.seed)), source)
+            filepath = os.path.join(tmp, f"weighted_{size}.maze")
+            Maze(source).save_binary(filepath)
+            os.remove(source)
+
+            reference = None
+            for mode in MODES:
+                if mode == "liste" and size > args.legacy_limit:
+                    continue
+                # Un processo nuovo per ogni caso, così le misure non si influenzano
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    peak, elapsed, weights = executor.submit(run_case, filepath, mode).result()
+                if reference is None:
+                    reference = weights
+                elif weights != reference:
+                    raise AssertionError(f"Pesi diversi con la modalità {mode}")
+                print(f"{size:>6}  {mode:<9}{peak / 2 ** 20:>11.1f}{peak / size ** 2:>14.1f}{elapsed:>10.2f}",
+                      flush=True)
+            print(f"{size:>6}  {'matrice':<9}{size ** 2 / 2 ** 20:>11.1f}{1.0:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Confronto di tempo e memoria tra la ricerca di Dijkstra che trasporta nella coda
+una copia del percorso ad ogni passo (versione originale) e quella che ricostruisce
+il percorso dai predecessori solo al termine della ricerca.
+
+Uso: python benchmarks/bench_predecessor.py [--size 401] [--seed 0]
+"""
+import argparse
+import glob
+import heapq
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from maze import Maze  # noqa: E402
+from path import Path  # noqa: E402
+from generator import open_room, perfect_maze, write_json  # noqa: E402
+
+
+def legacy_shortest_path(start, maze):
+
+    """
+    Versione originale di Path.find_shortest_path_by_weight, in cui ogni elemento
+    della coda contiene una copia dell'intero percorso.
+    """
+
+    queue = []
+    heapq.heappush(queue, (0, start, [start]))
+    visited = {start: 0}
+    while queue:
+        curr_weight, curr_pos, path = heapq.heappop(queue)
+        if curr_pos == maze.end:
+            return path, curr_weight
+        for next_pos, weight in maze.get_adjacent_positions(curr_pos):
+            if next_pos not in visited:
+                new_weight = curr_weight + weight
+                visited[next_pos] = new_weight
+                new_path = list(path)
+                new_path.append(next_pos)
+                heapq.heappush(queue, (new_weight, next_pos, new_path))
+    return None, 0
+
+
+def measure(function):
+
+    """
+    Esegue function e ne restituisce il risultato, il tempo impiegato in secondi
+    e il picco di memoria allocata in byte.
+    """
+
+    tracemalloc.start()
+    begin = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - begin
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=401, help="lato dei labirinti sintetici")
+    parser.add_argument("--seed", type=int, default=0, help="seme dei labirinti sintetici")
+    args = parser.parse_args()
+
+    indata = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "indata")
+    files = sorted(glob.glob(os.path.join(indata, "*.json")))
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic = os.path.join(tmp, f"perfect_{args.size}x{args.size}.json")
+        write_json(perfect_maze(args.size, args.size, starts=2, seed=args.seed), synthetic)
+        files.append(synthetic)
+        room = os.path.join(tmp, f"room_{args.size}x{args.size}.json")
+        write_json(open_room(args.size, args.size, starts=2, seed=args.seed), room)
+        files.append(room)
+
+        print(f"{'labirinto':<28}{'originale s':>13}{'pred. s':>10}{'originale KiB':>15}{'pred. KiB':>11}")
+        for filepath in files:
+            maze = Maze(filepath)
+            old, old_time, old_peak = measure(lambda: [legacy_shortest_path(start, maze) for start in maze.start])
+            new, new_time, new_peak = measure(lambda: Path(maze, solver="dijkstra"))
+            if old != list(zip(new.paths, new.weight)):
+                raise AssertionError(f"Risultati diversi per {filepath}")
+            print(f"{os.path.basename(filepath):<28}{old_time:>13.4f}{new_time:>10.4f}"
+                  f"{old_peak / 1024:>15.1f}{new_peak / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Generatore di carico per il servizio di risoluzione (server.py).
+
+Apre più connessioni contemporanee verso il servizio già avviato e, su ognuna, invia
+richieste /solve con caselle di partenza scelte a caso tra quelle percorribili del
+labirinto. Al termine riporta il throughput e i percentili della latenza delle richieste.
+
+Uso: python benchmarks/bench_service.py indata/labirinto3b_marked.json --requests 200 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+from maze import Maze  # noqa: E402
+
+
+async def post(reader, writer, target, payload):
+
+    """
+    Invia una richiesta POST su una connessione keep-alive e ne restituisce codice di stato
+    e contenuto della risposta.
+    """
+
+    body = json.dumps(payload).encode()
+    writer.write(f"POST {target} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def client(args, requests, latencies, failures):
+
+    """
+    Invia sulla stessa connessione le richieste ricevute, registrando la latenza di ognuna.
+    """
+
+    if args.unix is not None:
+        reader, writer = await asyncio.open_unix_connection(args.unix)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    try:
+        for payload in requests:
+            begin = time.perf_counter()
+            status, response = await post(reader, writer, "/solve", payload)
+            latencies.append(time.perf_counter() - begin)
+            if status != 200:
+                failures.append(response.get("error"))
+    finally:
+        writer.close()
+
+
+async def run(args, requests):
+    latencies = []
+    failures = []
+    # Le richieste vengono distribuite a turno tra le connessioni
+    begin = time.perf_counter()
+    await asyncio.gather(*(client(args, requests[k::args.concurrency], latencies, failures)
+                           for k in range(args.concurrency)))
+    return time.perf_counter() - begin, latencies, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("maze", help="labirinto da interrogare (path visto dal servizio)")
+    parser.add_argument("--host", default="127.0.0.1", help="indirizzo del servizio")
+    parser.add_argument("--port", type=int, default=8765, help="porta del servizio")
+    parser.add_argument("--unix", default=None, help="socket Unix del servizio, al posto della porta TCP")
+    parser.add_argument("--requests", type=int, default=200, help="numero di richieste")
+    parser.add_argument("--concurrency", type=int, default=8, help="connessioni contemporanee")
+    parser.add_argument("--starts", type=int, default=4, help="caselle di partenza per richiesta")
+    parser.add_argument("--solver", default="auto", help="algoritmo di ricerca")
+    parser.add_argument("--seed", type=int, default=0, help="seme delle partenze casuali")
+    args = parser.parse_args()
+
+    # Le partenze vengono scelte tra le caselle percorribili del labirinto
+    maze = Maze(args.maze)
+    cells = np.flatnonzero(maze.maze.reshape(-1))
+    rng = np.random.default_rng(args.seed)
+    filepath = os.path.abspath(args.maze)
+    requests = [{"maze": filepath, "solver": args.solver,
+                 "starts": [list(maze.cell_position(int(c))) for c in rng.choice(cells, args.starts)]}
+                for _ in range(args.requests)]
+
+    elapsed, latencies, failures = asyncio.run(run(args, requests))
+    latencies = np.array(latencies) * 1000
+    print(f"Richieste: {len(latencies)} in {elapsed:.2f} s ({len(latencies) / elapsed:.1f} richieste/s), "
+          f"errori: {len(failures)}")
+    for percentile in (50, 90, 99):
+        print(f"p{percentile}: {np.percentile(latencies, percentile):.1f} ms")
+    print(f"max: {latencies.max():.1f} ms")
+    if failures:
+        print(f"Primo errore: {failures[0]}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Confronto tra gli algoritmi di ricerca di Path: per ogni labirinto si riportano
+il tempo impiegato e il numero di nodi esplorati da ciascun algoritmo, verificando
+che i pesi dei percorsi trovati coincidano.
+
+Uso: python benchmarks/bench_solvers.py [--size 201] [--seed 0] [--starts 4]
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from maze import Maze  # noqa: E402
+from path import Path  # noqa: E402
+from generator import open_room, perfect_maze, write_json  # noqa: E402
+
+SOLVERS = ["dijkstra", "dial", "astar", "reverse", "corridor", "bfs"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=201, help="lato dei labirinti sintetici")
+    parser.add_argument("--seed", type=int, default=0, help="seme dei labirinti sintetici")
+    parser.add_argument("--starts", type=int, default=4, help="partenze dei labirinti sintetici")
+    args = parser.parse_args()
+
+    indata = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "indata")
+    files = sorted(glob.glob(os.path.join(indata, "*.json")))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, generate in (("perfect", perfect_maze), ("room", open_room)):
+            filepath = os.path.join(tmp, f"{name}_{args.size}x{args.size}.json")
+            write_json(generate(args.size, args.size, starts=args.starts, seed=args.seed), filepath)
+            files.append(filepath)
+
+        print(f"{'labirinto':<28}{'algoritmo':<12}{'tempo s':>10}{'nodi esplorati':>16}")
+        for filepath in files:
+            maze = Maze(filepath)
+            reference = None
+            for solver in SOLVERS:
+                # La ricerca in ampiezza vale solo per i labirinti senza caselle grigie
+                if solver == "bfs" and maze.maze.max() > 1:
+                    continue
+                begin = time.perf_counter()
+                path = Path(maze, solver=solver)
+                elapsed = time.perf_counter() - begin
+                if reference is None:
+                    reference = path.weight
+                elif path.weight != reference:
+                    raise AssertionError(f"Pesi diversi per {filepath} con {solver}")
+                print(f"{os.path.basename(filepath):<28}{solver:<12}{elapsed:>10.4f}{path.expanded:>16}")
+
+
+if __name__ == "__main__":
+    main()
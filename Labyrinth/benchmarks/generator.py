@@ -0,0 +1,255 @@
+"""
+Generatore deterministico (dato il seme) di labirinti sintetici per i benchmark.
+
+Sono disponibili tre tipi di labirinto:
+
+    - "perfect": labirinto perfetto (un solo percorso tra due caselle qualsiasi),
+      scavato con una visita in profondità casuale
+
+    - "room": stanza aperta, con i soli muri sul bordo
+
+    - "weighted": campo di caselle con pesi casuali da 1 a 16 e muri sparsi
+
+I labirinti possono essere salvati sia in formato JSON che PNG, con un numero
+qualsiasi di caselle di partenza.
+"""
+import json
+import random
+
+import numpy as np
+from PIL import Image
+
+KINDS = ("perfect", "room", "weighted")
+
+
+def perfect_grid(height, width, seed=0):
+
+    """
+    Questa funzione genera la matrice di un labirinto perfetto scavando i corridoi con
+    una visita in profondità casuale sulle caselle di coordinate dispari.
+
+    Parameters
+    ----------
+    height : int
+        Numero di righe del labirinto (se pari viene ridotto di 1)
+
+    width : int
+        Numero di colonne del labirinto (se pari viene ridotto di 1)
+
+    seed : int
+        Seme del generatore casuale
+
+    Returns
+    -------
+    grid : numpy.ndarray
+        Matrice uint8 del labirinto, con 0 per i muri e 1 per i corridoi.
+    """
+
+    rng = random.Random(seed)
+    # Le celle scavabili hanno coordinate dispari, per cui le dimensioni devono essere dispari
+    height -= 1 - height % 2
+    width -= 1 - width % 2
+    # Dimensioni del reticolo delle celle scavabili
+    cells_h, cells_w = (height - 1) // 2, (width - 1) // 2
+
+    # Si lavora su bytearray e indici piatti per rendere veloce il ciclo anche su milioni di celle
+    grid = bytearray(height * width)
+    visited = bytearray(cells_h * cells_w)
+    visited[0] = 1
+    grid[width + 1] = 1
+    stack = [0]
+    while stack:
+        cell = stack[-1]
+        ci, cj = divmod(cell, cells_w)
+        candidates = []
+        if ci > 0 and not visited[cell - cells_w]:
+            candidates.append(cell - cells_w)
+        if ci < cells_h - 1 and not visited[cell + cells_w]:
+            candidates.append(cell + cells_w)
+        if cj > 0 and not visited[cell - 1]:
+            candidates.append(cell - 1)
+        if cj < cells_w - 1 and not visited[cell + 1]:
+            candidates.append(cell + 1)
+        if not candidates:
+            stack.pop()
+            continue
+        chosen = candidates[rng.randrange(len(candidates))]
+        visited[chosen] = 1
+        ni, nj = divmod(chosen, cells_w)
+        # Si abbatte il muro tra la cella corrente e quella scelta e si scava la cella scelta
+        grid[(ci + ni + 1) * width + cj + nj + 1] = 1
+        grid[(2 * ni + 1) * width + 2 * nj + 1] = 1
+        stack.append(chosen)
+
+    return np.frombuffer(bytes(grid), dtype=np.uint8).reshape(height, width).copy()
+
+
+def room_grid(height, width, seed=0):
+
+    """
+    Questa funzione genera la matrice di una stanza aperta: tutte le caselle sono
+    percorribili tranne il bordo, costituito da muri.
+    """
+
+    grid = np.ones((height, width), dtype=np.uint8)
+    grid[[0, -1], :] = 0
+    grid[:, [0, -1]] = 0
+    return grid
+
+
+def weighted_grid(height, width, seed=0, wall_density=0.2):
+
+    """
+    Questa funzione genera un campo di caselle con pesi casuali da 1 a 16, in cui
+    una frazione wall_density delle caselle è costituita da muri.
+    """
+
+    rng = np.random.default_rng(seed)
+    grid = rng.integers(1, 17, size=(height, width), dtype=np.uint8)
+    grid[rng.random((height, width)) < wall_density] = 0
+    return grid
+
+
+def generate(kind, height, width, starts=1, seed=0):
+
+    """
+    Questa funzione genera un labirinto del tipo indicato e sceglie a caso, tra le
+    caselle percorribili, le caselle di partenza e quella di arrivo.
+
+    Parameters
+    ----------
+    kind : str
+        Tipo di labirinto: "perfect", "room" o "weighted"
+
+    height : int
+        Numero di righe del labirinto
+
+    width : int
+        Numero di colonne del labirinto
+
+    starts : int
+        Numero di caselle di partenza da posizionare
+
+    seed : int
+        Seme del generatore casuale, in modo da ottenere sempre lo stesso labirinto
+
+    Returns
+    -------
+    grid : numpy.ndarray
+        Matrice uint8 del labirinto.
+
+    start : list
+        Lista delle caselle di partenza, ordinate per righe.
+
+    end : tuple
+        Casella di arrivo.
+    """
+
+    builders = {"perfect": perfect_grid, "room": room_grid, "weighted": weighted_grid}
+    if kind not in builders:
+        raise ValueError(f"Tipo di labirinto non supportato: {kind}")
+    grid = builders[kind](height, width, seed)
+
+    rng = np.random.default_rng(seed)
+    free = np.flatnonzero(grid)
+    chosen = free[rng.choice(len(free), size=starts + 1, replace=False)]
+    # Partenze e arrivo hanno peso 1, come le caselle verdi e rosse delle immagini
+    grid.reshape(-1)[chosen] = 1
+    positions = [divmod(int(cell), grid.shape[1]) for cell in chosen]
+    # Le partenze sono ordinate per righe, come quelle lette da un'immagine
+    return grid, sorted(positions[1:]), positions[0]
+
+
+def grid_to_data(grid, start, end):
+
+    """
+    Questa funzione converte la matrice di un labirinto nel dizionario del formato
+    JSON accettato da Maze. I muri consecutivi di ogni riga vengono raggruppati in un
+    unico segmento orizzontale.
+
+    Parameters
+    ----------
+    grid : numpy.ndarray
+        Matrice che rappresenta il labirinto
+
+    start : list
+        Lista delle caselle di partenza
+
+    end : tuple
+        Casella di arrivo
+
+    Returns
+    -------
+    data : dict
+        Dizionario con le chiavi "larghezza", "altezza", "pareti", "iniziali",
+        "finale" e "costi".
+    """
+
+    height, width = grid.shape
+    # Si individuano inizio e fine dei tratti di muro di ogni riga dalle variazioni della maschera
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = grid == 0
+    changes = np.diff(padded, axis=1)
+    rows, first = np.nonzero(changes == 1)
+    _, last = np.nonzero(changes == -1)
+    walls = [{"orientamento": "H", "posizione": [i, j], "lunghezza": n}
+             for i, j, n in zip(rows.tolist(), first.tolist(), (last - first).tolist())]
+
+    # Nel formato JSON il costo vale il peso della casella meno 1
+    cost_rows, cost_cols = np.nonzero(grid > 1)
+    costs = np.stack([cost_rows, cost_cols, grid[cost_rows, cost_cols].astype(np.int64) - 1], axis=1).tolist()
+
+    return {
+        "larghezza": width,
+        "altezza": height,
+        "pareti": walls,
+        "iniziali": [list(pos) for pos in start],
+        "finale": [list(end)],
+        "costi": costs,
+    }
+
+
+def perfect_maze(height, width, starts=1, seed=0):
+
+    """
+    Genera un labirinto perfetto e lo restituisce nel formato JSON accettato da Maze.
+    """
+
+    return grid_to_data(*generate("perfect", height, width, starts, seed))
+
+
+def open_room(height, width, starts=1, seed=0):
+
+    """
+    Genera una stanza aperta e la restituisce nel formato JSON accettato da Maze.
+    """
+
+    return grid_to_data(*generate("room", height, width, starts, seed))
+
+
+def write_json(data, filepath):
+
+    """
+    Salva il labirinto generato in un file JSON leggibile da Maze.
+    """
+
+    with open(filepath, "w") as f:
+        json.dump(data, f)
+
+
+def write_png(grid, start, end, filepath):
+
+    """
+    Salva il labirinto generato in un'immagine PNG leggibile da Maze: muri neri,
+    corridoi bianchi, caselle pesate in scala di grigi, partenze verdi e arrivo rosso.
+    """
+
+    # Tabella di conversione dal peso della casella al colore del pixel
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    palette[1] = 255
+    palette[2:17] = (np.arange(2, 17, dtype=np.uint8) - 1)[:, None] * 16
+    pixels = palette[grid]
+    for i, j in start:
+        pixels[i, j] = (0, 255, 0)
+    pixels[end[0], end[1]] = (255, 0, 0)
+    Image.fromarray(pixels, "RGB").save(filepath)
@@ -0,0 +1,160 @@
+"""
+Suite di benchmark su labirinti sintetici di dimensioni crescenti.
+
+Per ogni combinazione di tipo di labirinto, dimensione e formato si genera (una sola
+volta, riutilizzandolo nelle esecuzioni successive) il labirinto con generator.py e si
+misurano separatamente le fasi di caricamento (Maze), ricerca (Path) e disegno
+(output_generation), riportando tempo e memoria di ciascuna. Ogni caso viene eseguito
+in un processo separato, in modo che le misure di memoria non si influenzino.
+
+Il picco di memoria residente del processo (ru_maxrss) può solo crescere, per cui per
+ogni fase si registrano il picco raggiunto fino alla sua fine (cumulative_max_rss_bytes)
+e quanto la fase lo ha alzato (max_rss_growth_bytes, 0 se la fase ha usato meno memoria
+di quelle precedenti); il picco della sola fase è traced_peak_bytes, con --tracemalloc.
+I risultati vengono salvati in un file JSON per confrontare le esecuzioni nel tempo.
+
+Uso: python benchmarks/suite.py --sizes 100 1000 8000 --kinds perfect room --starts 8
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+
+from maze import Maze  # noqa: E402
+from path import Path  # noqa: E402
+from output import output_generation  # noqa: E402
+from generator import KINDS, generate, grid_to_data, write_json, write_png  # noqa: E402
+
+
+def max_rss():
+
+    """
+    Restituisce il picco di memoria residente del processo in byte
+    (su Linux ru_maxrss è espresso in KiB, su macOS in byte).
+    """
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def prepare(kind, size, fmt, starts, seed, workdir):
+
+    """
+    Genera il labirinto richiesto nella directory workdir, se non è già presente,
+    e ne restituisce il path.
+    """
+
+    filepath = os.path.join(workdir, f"{kind}_{size}x{size}_s{starts}_seed{seed}.{fmt}")
+    if not os.path.exists(filepath):
+        grid, start, end = generate(kind, size, size, starts, seed)
+        # Si scrive su un file temporaneo in modo da non lasciare file incompleti se interrotti
+        partial = filepath + ".partial"
+        if fmt == "json":
+            write_json(grid_to_data(grid, start, end), partial)
+        else:
+            write_png(grid, start, end, partial + ".png")
+            os.replace(partial + ".png", partial)
+        os.replace(partial, filepath)
+    return filepath
+
+
+def run_stage(name, function, trace, record):
+
+    """
+    Esegue una fase del benchmark e ne aggiunge tempo e memoria a record.
+    """
+
+    if trace:
+        tracemalloc.start()
+    rss_before = max_rss()
+    begin = time.perf_counter()
+    result = function()
+    rss_after = max_rss()
+    stage = {"seconds": time.perf_counter() - begin, "cumulative_max_rss_bytes": rss_after,
+             "max_rss_growth_bytes": rss_after - rss_before}
+    if trace:
+        stage["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    record["stages"][name] = stage
+    return result
+
+
+def run_case(filepath, solver, render, trace):
+
+    """
+    Esegue, nel processo corrente, le fasi di caricamento, ricerca e disegno
+    di un labirinto e ne restituisce le misure.
+    """
+
+    record = {"file": os.path.basename(filepath), "stages": {}}
+    m = run_stage("load", lambda: Maze(filepath), trace, record)
+    p = run_stage("solve", lambda: Path(m, solver=solver), trace, record)
+    record["expanded"] = p.expanded
+    record["weights"] = [int(w) for w in p.weight]
+    record["lengths"] = [len(path) if path is not None else None for path in p.paths]
+    if render:
+        with tempfile.TemporaryDirectory() as output_dir:
+            run_stage("render", lambda: output_generation(filepath, p.paths, p.weight, m, output_dir), trace, record)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000, 2000], help="lati dei labirinti")
+    parser.add_argument("--kinds", nargs="+", default=list(KINDS), choices=KINDS, help="tipi di labirinto")
+    parser.add_argument("--formats", nargs="+", default=["json", "png"], choices=["json", "png"], help="formati")
+    parser.add_argument("--starts", type=int, default=4, help="numero di partenze")
+    parser.add_argument("--seed", type=int, default=0, help="seme del generatore")
+    parser.add_argument("--solver", default="dijkstra", help="algoritmo di ricerca di Path")
+    parser.add_argument("--render-limit", type=int, default=500,
+                        help="lato massimo per cui misurare anche la fase di disegno")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="misura anche il picco di memoria allocata in ogni fase (rallenta l'esecuzione)")
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "labyrinth_bench"),
+                        help="directory in cui conservare i labirinti generati")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="file JSON dei risultati")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    for kind in args.kinds:
+        for size in args.sizes:
+            for fmt in args.formats:
+                filepath = prepare(kind, size, fmt, args.starts, args.seed, args.workdir)
+                # Un processo nuovo per ogni caso, così il picco di memoria residente è solo suo
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    record = executor.submit(run_case, filepath, args.solver,
+                                             size <= args.render_limit, args.tracemalloc).result()
+                record.update({"kind": kind, "size": size, "format": fmt, "starts": args.starts})
+                results.append(record)
+                # Per ogni fase: secondi e crescita del picco di memoria residente del processo
+                stages = "  ".join(f"{name} {stage['seconds']:.3f}s/+{stage['max_rss_growth_bytes'] / 2 ** 20:.0f}MiB"
+                                   for name, stage in record["stages"].items())
+                print(f"{kind:<9}{size:>6} {fmt:<5} {stages}", flush=True)
+
+    report = {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "solver": args.solver,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+class MazeCache:
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, store_distance=False, enabled=True):
+
+        """
+        Costruttore della classe MazeCache, una cache su disco dei labirinti risolti.
+        Le voci sono indirizzate dal contenuto del labirinto (matrice decodificata,
+        partenze e arrivo) e non dai byte del file, per cui lo stesso labirinto in
+        formato JSON, PNG, JPEG o TIFF corrisponde alla stessa voce.
+
+        Parameters
+        ----------
+        directory : str
+            Directory in cui salvare le voci della cache
+
+        max_bytes : int
+            Dimensione massima della cache: superata questa soglia si eliminano
+            le voci usate meno di recente (LRU)
+
+        store_distance : bool
+            Se True, quando disponibile si salva anche il campo delle distanze dall'arrivo
+
+        enabled : bool
+            Se False la cache viene ignorata sia in lettura che in scrittura
+
+        Returns
+        -------
+        None.
+        """
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.store_distance = store_distance
+        self.enabled = enabled
+
+    def key(self, maze):
+
+        """
+        Questo metodo calcola la chiave di un labirinto come hash SHA-256 delle
+        dimensioni e dei pesi della matrice, delle caselle di partenza e di quella di arrivo.
+
+        Parameters
+        ----------
+        maze : Maze
+            Labirinto di cui calcolare la chiave
+
+        Returns
+        -------
+        key : str
+            Hash esadecimale che identifica il labirinto.
+        """
+
+        digest = hashlib.sha256()
+        digest.update(np.array(maze.maze.shape, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(maze.maze, dtype=np.uint8).tobytes())
+        digest.update(json.dumps([[list(start) for start in maze.start], list(maze.end)]).encode())
+        return digest.hexdigest()
+
+    def get(self, maze):
+
+        """
+        Questo metodo cerca nella cache il labirinto dato.
+
+        Parameters
+        ----------
+        maze : Maze
+            Labirinto da cercare
+
+        Returns
+        -------
+        entry : dict
+            None se il labirinto non è presente, altrimenti un dizionario con chiavi
+            "paths", "weight" e "distance" (il campo delle distanze dall'arrivo,
+            None se non è stato salvato).
+        """
+
+        if not self.enabled:
+            return None
+        base = os.path.join(self.directory, self.key(maze))
+        # Un altro processo che condivide la directory può eliminare la voce in qualsiasi
+        # momento: se un suo file scompare durante la lettura la si tratta come assente
+        try:
+            with open(base + ".json") as f:
+                data = json.load(f)
+            # Si aggiorna la data di modifica della voce, utilizzata come data dell'ultimo accesso per l'LRU
+            os.utime(base + ".json")
+            distance = None
+            if os.path.exists(base + ".npy"):
+                os.utime(base + ".npy")
+                distance = np.load(base + ".npy", mmap_mode="r")
+            return {
+                "paths": [[tuple(pos) for pos in path] if path is not None else None for path in data["paths"]],
+                "weight": data["weight"],
+                "distance": distance,
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def put(self, maze, paths, weights, distance=None):
+
+        """
+        Questo metodo salva nella cache i percorsi calcolati per il labirinto dato
+        ed elimina, se necessario, le voci usate meno di recente.
+
+        Parameters
+        ----------
+        maze : Maze
+            Labirinto risolto
+
+        paths : list
+            Percorsi trovati per ogni casella di partenza
+
+        weights : list
+            Peso di ogni percorso
+
+        distance : numpy.ndarray
+            Campo delle distanze dall'arrivo (opzionale), salvato solo se store_distance è True
+
+        Returns
+        -------
+        None.
+        """
+
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, self.key(maze))
+        # Si scrive prima su un file temporaneo e poi lo si rinomina, in modo che processi
+        # diversi che usano la stessa cache non leggano mai una voce scritta a metà
+        if distance is not None and self.store_distance:
+            with open(f"{base}.{os.getpid()}.npy.tmp", "wb") as f:
+                np.save(f, distance)
+            os.replace(f"{base}.{os.getpid()}.npy.tmp", base + ".npy")
+        with open(f"{base}.{os.getpid()}.json.tmp", "w") as f:
+            json.dump({"paths": paths, "weight": weights}, f)
+        os.replace(f"{base}.{os.getpid()}.json.tmp", base + ".json")
+        self.evict()
+
+    def evict(self):
+
+        """
+        Questo metodo elimina le voci usate meno di recente finché la dimensione
+        totale della cache non rientra in max_bytes.
+
+        Returns
+        -------
+        None.
+        """
+
+        entries = {}
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith((".json", ".npy")):
+                continue
+            # Un altro processo può aver eliminato il file dopo listdir
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            key = name.split(".")[0]
+            size, last_used = entries.get(key, (0, 0))
+            entries[key] = (size + stat.st_size, max(last_used, stat.st_mtime))
+            total += stat.st_size
+
+        # Si eliminano le voci a partire da quella usata meno di recente
+        for key, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_bytes:
+                break
+            for ext in (".json", ".npy"):
+                try:
+                    os.remove(os.path.join(self.directory, key + ext))
+                except FileNotFoundError:
+                    pass
+            total -= size
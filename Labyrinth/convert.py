@@ -0,0 +1,296 @@
+"""
+Conversione non interattiva dei labirinti tra i formati supportati.
+
+Accetta file, directory e pattern glob (come batch.py) e, per ogni labirinto, scrive le
+versioni PNG, JPEG, TIFF e binaria (.maze) richieste, caricandolo una sola volta con Maze.
+I labirinti vengono convertiti in parallelo in un pool di processi e gli output già
+aggiornati vengono saltati, confrontando la data di modifica con quella del file di
+partenza oppure, con --check hash, l'hash del suo contenuto registrato alla conversione
+precedente.
+
+Se più file in ingresso hanno lo stesso nome (ad esempio labirinto.json e labirinto.png
+nella stessa directory), sono versioni dello stesso labirinto: si converte solo quello
+modificato più di recente (a parità, nell'ordine .json, .tiff, .png, .jpeg, .maze) e gli
+altri diventano i suoi output.
+
+Uso: python convert.py indata/ -f png jpeg tiff maze -j 4
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from batch import collect_inputs
+from maze import Maze
+
+# Formati di output, con l'estensione dei file corrispondenti
+FORMATS = {"png": ".png", "jpeg": ".jpeg", "tiff": ".tiff", "maze": ".maze"}
+
+# Ordine di preferenza tra file con lo stesso nome: il primo è la sorgente degli altri
+SOURCE_PRIORITY = (".json", ".tiff", ".png", ".jpeg", ".maze")
+
+# Nome del file, in ogni directory di output, con gli hash delle sorgenti già convertite
+MANIFEST = ".conversioni.json"
+
+
+def file_digest(filepath):
+
+    """
+    Restituisce l'hash SHA-256 del contenuto del file, letto a blocchi.
+    """
+
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def plan_conversions(filepaths, formats, output_dir=None, manifests=None):
+
+    """
+    Questa funzione stabilisce quali file convertire e in quali output.
+    Tra i file con lo stesso nome la sorgente è quello modificato più di recente; a parità
+    di data (gli output ricevono quella della loro sorgente) si preferisce un file che non
+    risulta generato da una conversione precedente e poi l'ordine di SOURCE_PRIORITY.
+
+    Parameters
+    ----------
+    filepaths : list
+        Path dei file in ingresso
+
+    formats : list
+        Formati di output richiesti (chiavi di FORMATS)
+
+    output_dir : str
+        Directory in cui scrivere gli output (di default quella di ogni file in ingresso)
+
+    manifests : dict
+        Manifesto di ogni directory di output, usato con --check hash
+
+    Returns
+    -------
+    jobs : list
+        Coppie (sorgente, lista degli output), dove ogni output è il path di un file
+        in uno dei formati richiesti diverso da quello della sorgente.
+    """
+
+    groups = {}
+    for filepath in filepaths:
+        name, ext = os.path.splitext(os.path.basename(filepath))
+        # Il manifesto non è un labirinto
+        if name + ext == MANIFEST:
+            continue
+        directory = output_dir if output_dir is not None else os.path.dirname(filepath)
+        groups.setdefault((directory, name), []).append(filepath)
+
+    jobs = []
+    for (directory, name), members in groups.items():
+        generated = (manifests or {}).get(directory, {})
+
+        def preference(filepath):
+            ext = os.path.splitext(filepath)[1]
+            # I file con estensione non supportata finiscono in fondo e producono un errore di Maze
+            priority = SOURCE_PRIORITY.index(ext) if ext in SOURCE_PRIORITY else len(SOURCE_PRIORITY)
+            return -os.stat(filepath).st_mtime_ns, os.path.basename(filepath) in generated, priority
+
+        source = min(members, key=preference)
+        source_ext = os.path.splitext(source)[1]
+        outputs = [os.path.join(directory, name + FORMATS[fmt]) for fmt in formats if FORMATS[fmt] != source_ext]
+        jobs.append((source, outputs))
+    return jobs
+
+
+def up_to_date(source, output, check, digest, manifest):
+
+    """
+    Verifica se l'output è aggiornato rispetto alla sorgente: con check "mtime" se non è
+    più vecchio della sorgente, con check "hash" se è stato generato da una sorgente con
+    lo stesso contenuto (registrato nel manifesto della sua directory).
+    """
+
+    if not os.path.exists(output):
+        return False
+    if check == "hash":
+        return manifest.get(os.path.basename(output)) == digest
+    return os.stat(output).st_mtime_ns >= os.stat(source).st_mtime_ns
+
+
+def convert_file(source, outputs, check="mtime", manifest=None, force=False):
+
+    """
+    Questa funzione, eseguita in un processo del pool, converte un labirinto negli
+    output indicati che non sono già aggiornati.
+    Gli errori vengono catturati e restituiti, in modo che un file non valido non
+    interrompa la conversione degli altri.
+
+    Parameters
+    ----------
+    source : str
+        Path del file da convertire
+
+    outputs : list
+        Path dei file da scrivere, di cui l'estensione indica il formato
+
+    check : str
+        Criterio per riconoscere gli output aggiornati: "mtime" o "hash"
+
+    manifest : dict
+        Hash della sorgente di ogni output già convertito, indicizzati per nome del file
+
+    force : bool
+        Se True gli output vengono riscritti anche se aggiornati
+
+    Returns
+    -------
+    result : tuple
+        (sorgente, output scritti, output saltati, hash della sorgente, secondi impiegati, errore),
+        dove errore è None se la conversione è andata a buon fine.
+    """
+
+    begin = time.perf_counter()
+    written = []
+    skipped = []
+    digest = None
+    try:
+        if check == "hash":
+            digest = file_digest(source)
+        pending = [output for output in outputs
+                   if force or not up_to_date(source, output, check, digest, manifest or {})]
+        skipped = [output for output in outputs if output not in pending]
+        if pending:
+            source_mtime = os.stat(source).st_mtime_ns
+            maze = Maze(source)
+            for output in pending:
+                os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+                ext = os.path.splitext(output)[1]
+                if ext == ".maze":
+                    maze.save_binary(output)
+                elif ext == ".jpeg":
+                    # Come nei file di indata, il .jpeg viene salvato con codifica PNG: la
+                    # compressione JPEG altererebbe i colori dei pixel e il labirinto non
+                    # sarebbe più riconosciuto da image_to_maze
+                    maze.image.convert("RGB").save(output, format="PNG")
+                else:
+                    maze.image.convert("RGB").save(output)
+                # L'output riceve la data di modifica della sorgente: alla conversione successiva
+                # risulta aggiornato e, se la sorgente non cambia, non la sostituisce come sorgente
+                os.utime(output, ns=(time.time_ns(), source_mtime))
+                written.append(output)
+    except Exception as error:
+        return source, written, skipped, digest, time.perf_counter() - begin, f"{type(error).__name__}: {error}"
+    return source, written, skipped, digest, time.perf_counter() - begin, None
+
+
+def load_manifest(directory):
+
+    """
+    Legge il manifesto degli hash di una directory di output (vuoto se assente o non valido).
+    """
+
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def run_conversions(filepaths, formats, output_dir=None, workers=None, check="mtime", force=False):
+
+    """
+    Questa funzione pianifica le conversioni con plan_conversions, le distribuisce tra i
+    processi di un ProcessPoolExecutor e, con check "hash", aggiorna al termine i manifesti
+    delle directory di output.
+
+    Parameters
+    ----------
+    filepaths : list
+        Path dei file in ingresso
+
+    formats : list
+        Formati di output richiesti (chiavi di FORMATS)
+
+    output_dir : str
+        Directory in cui scrivere gli output (di default quella di ogni file in ingresso)
+
+    workers : int
+        Numero di processi da utilizzare (di default il numero di CPU)
+
+    check : str
+        Criterio per riconoscere gli output aggiornati: "mtime" o "hash"
+
+    force : bool
+        Se True gli output vengono riscritti anche se aggiornati
+
+    Returns
+    -------
+    results : list
+        Risultati di convert_file per tutte le sorgenti.
+    """
+
+    manifests = {}
+    if check == "hash":
+        for filepath in filepaths:
+            directory = output_dir if output_dir is not None else os.path.dirname(filepath)
+            if directory not in manifests:
+                manifests[directory] = load_manifest(directory)
+    jobs = plan_conversions(filepaths, formats, output_dir, manifests)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(convert_file, source, outputs, check,
+                                   manifests.get(os.path.dirname(outputs[0])) if outputs else None, force)
+                   for source, outputs in jobs]
+        results = [future.result() for future in futures]
+
+    if check == "hash":
+        changed = set()
+        for _, written, _, digest, _, _ in results:
+            for output in written:
+                manifests[os.path.dirname(output)][os.path.basename(output)] = digest
+                changed.add(os.path.dirname(output))
+        for directory in changed:
+            # Scrittura atomica, come per le voci di MazeCache
+            tmp = os.path.join(directory, f"{MANIFEST}.{os.getpid()}.tmp")
+            with open(tmp, "w") as f:
+                json.dump(manifests[directory], f, indent=1, sort_keys=True)
+            os.replace(tmp, os.path.join(directory, MANIFEST))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="file, directory o pattern glob da convertire")
+    parser.add_argument("-f", "--formats", nargs="+", default=list(FORMATS), choices=list(FORMATS),
+                        help="formati di output (default: tutti)")
+    parser.add_argument("-o", "--output-dir", default=None,
+                        help="directory dei file convertiti (default: quella di ogni file in ingresso)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="numero di processi (default: numero di CPU)")
+    parser.add_argument("--check", default="mtime", choices=["mtime", "hash"],
+                        help="criterio per saltare gli output aggiornati: data di modifica o hash della sorgente")
+    parser.add_argument("--force", action="store_true", help="riscrive anche gli output aggiornati")
+    args = parser.parse_args(argv)
+
+    filepaths = collect_inputs(args.inputs)
+    if not filepaths:
+        parser.error("nessun file da convertire")
+
+    begin = time.perf_counter()
+    results = run_conversions(filepaths, args.formats, args.output_dir, args.workers, args.check, args.force)
+    elapsed = time.perf_counter() - begin
+
+    failures = [(source, error) for source, _, _, _, _, error in results if error is not None]
+    for source, error in failures:
+        print(f"ERRORE {source}: {error}", file=sys.stderr)
+    written = sum(len(w) for _, w, _, _, _, _ in results)
+    skipped = sum(len(s) for _, _, s, _, _, _ in results)
+    print(f"Labirinti convertiti: {len(results) - len(failures)}/{len(results)} in {elapsed:.2f} s "
+          f"(file scritti: {written}, già aggiornati: {skipped})")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
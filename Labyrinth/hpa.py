@@ -0,0 +1,593 @@
+"""
+Ricerca gerarchica a tessere (HPA*, Hierarchical Path-Finding A*) per labirinti molto grandi.
+
+Il labirinto viene diviso in tessere quadrate di lato fissato. Sui bordi tra tessere
+adiacenti si scelgono alcune coppie di caselle percorribili (gli ingressi) e, una sola
+volta, si calcola il peso minimo tra gli ingressi di ogni tessera restando al suo interno:
+ingressi e pesi formano un grafo astratto molto più piccolo del labirinto. Ogni richiesta
+partenza -> arrivo collega partenza e arrivo agli ingressi della rispettiva tessera,
+cerca sul grafo astratto e ricostruisce le caselle del percorso solo nelle tessere attraversate.
+
+Come nell'HPA* originale, su un tratto di bordo percorribile lungo si usano solo due
+ingressi (uno per estremo) e su uno corto uno solo, al centro: i percorsi restituiti sono
+sempre validi, ma il loro peso può superare di poco quello minimo calcolato da Path.
+Un tratto di bordo non supera il lato della tessera, per cui il suo ingresso più vicino
+dista al più (tile_size - 1) / 2 caselle da qualsiasi suo punto: spostandosi lungo il
+bordo fino all'ingresso e tornando indietro dall'altra parte, ogni attraversamento di un
+bordo tra tessere del percorso minimo costa al più tile_size * (peso massimo) - 1 in più.
+Il peso di HierarchicalPath non supera quindi quello minimo più questa quantità per il
+numero di bordi che il percorso minimo attraversa, e l'arrivo viene trovato per tutte e
+sole le partenze da cui Path lo raggiunge.
+"""
+import hashlib
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Peso provvisorio delle caselle non ancora raggiunte
+INFINITY = float("inf")
+
+# Un tratto di bordo percorribile di almeno questa lunghezza riceve due ingressi invece di uno
+LONG_ENTRANCE = 6
+
+
+def tile_search(tile, source, reverse=False, goal=-1):
+
+    """
+    Questa funzione svolge una ricerca di Dijkstra limitata a una tessera.
+
+    Parameters
+    ----------
+    tile : numpy.ndarray
+        Matrice dei pesi della tessera
+
+    source : int
+        Indice piatto (locale alla tessera) della casella da cui parte la ricerca
+
+    reverse : bool
+        Se False si calcola il peso minimo da source a ogni casella; se True il peso
+        minimo da ogni casella a source (percorrendo la tessera al contrario)
+
+    goal : int
+        Indice piatto della casella a cui interrompere la ricerca, se serve un solo percorso
+
+    Returns
+    -------
+    distance : list
+        Peso minimo di ogni casella della tessera (infinito se non raggiungibile).
+
+    predecessor : list
+        Per la ricerca in avanti, la casella da cui è stata raggiunta ogni casella;
+        per quella al contrario, la casella successiva verso source.
+    """
+
+    height, width = tile.shape
+    weights = tile.reshape(-1).tolist()
+    distance = [INFINITY] * len(weights)
+    distance[source] = 0
+    predecessor = [-1] * len(weights)
+    queue = [(0, source)]
+    while queue:
+        curr_weight, curr_pos = heapq.heappop(queue)
+        if curr_weight > distance[curr_pos]:
+            continue
+        if curr_pos == goal:
+            break
+        i, j = divmod(curr_pos, width)
+        # Al contrario, entrare in curr_pos da una casella adiacente costa il peso di curr_pos
+        step = weights[curr_pos] if reverse else 0
+        for next_pos, inside in ((curr_pos - width, i > 0), (curr_pos + width, i < height - 1),
+                                 (curr_pos - 1, j > 0), (curr_pos + 1, j < width - 1)):
+            if not inside or not weights[next_pos]:
+                continue
+            new_weight = curr_weight + (step if reverse else weights[next_pos])
+            if new_weight < distance[next_pos]:
+                distance[next_pos] = new_weight
+                predecessor[next_pos] = curr_pos
+                heapq.heappush(queue, (new_weight, next_pos))
+    return distance, predecessor
+
+
+def band_edges(band, row, tile_size, entrances):
+
+    """
+    Questa funzione, eseguita in un processo del pool, calcola gli archi interni delle
+    tessere di una fascia di righe: per ogni ingresso, il peso minimo per raggiungere
+    ciascuno degli altri ingressi della stessa tessera restando al suo interno.
+
+    Parameters
+    ----------
+    band : numpy.ndarray
+        Righe del labirinto che formano la fascia di tessere
+
+    row : int
+        Indice, nel labirinto, della prima riga della fascia
+
+    tile_size : int
+        Lato delle tessere
+
+    entrances : dict
+        Associa all'indice di colonna di ogni tessera della fascia la lista delle
+        caselle (i, j) di ingresso, in coordinate del labirinto
+
+    Returns
+    -------
+    edges : list
+        Terne (casella di partenza, casella di arrivo, peso) in coordinate del labirinto.
+    """
+
+    edges = []
+    for tile_col, cells in entrances.items():
+        col = tile_col * tile_size
+        tile = band[:, col:col + tile_size]
+        width = tile.shape[1]
+        local = [(i - row) * width + (j - col) for i, j in cells]
+        for source, cell in zip(local, cells):
+            distance, _ = tile_search(tile, source)
+            for target, other in zip(local, cells):
+                if target != source and distance[target] != INFINITY:
+                    edges.append((cell, other, distance[target]))
+    return edges
+
+
+class TileAbstraction:
+    def __init__(self, tile_size, shape, digest, nodes, offsets, targets, costs):
+
+        """
+        Costruttore della classe TileAbstraction, il grafo astratto di HPA*: i nodi sono le
+        caselle di ingresso delle tessere, gli archi collegano gli ingressi di una stessa
+        tessera (con il peso minimo al suo interno) e le coppie di ingressi affacciate
+        su tessere adiacenti. Si costruisce con TileAbstraction.build e si può salvare e
+        ricaricare con save e load.
+
+        Parameters
+        ----------
+        tile_size : int
+            Lato delle tessere
+
+        shape : tuple
+            Dimensioni del labirinto
+
+        digest : str
+            Hash SHA-256 della matrice del labirinto, per riconoscere un'astrazione
+            calcolata su un labirinto diverso
+
+        nodes : numpy.ndarray
+            Indice piatto della casella di ogni nodo
+
+        offsets, targets, costs : numpy.ndarray
+            Archi uscenti di ogni nodo in formato CSR, con il nodo di destinazione e il peso
+
+        Returns
+        -------
+        None.
+        """
+
+        self.tile_size = tile_size
+        self.shape = tuple(shape)
+        self.digest = digest
+        self.nodes = nodes
+        self.offsets = offsets
+        self.targets = targets
+        self.costs = costs
+        # Nodi di ogni tessera, indicizzati dalla coppia (riga, colonna) della tessera
+        self.tile_nodes = {}
+        width = self.shape[1]
+        for node, cell in enumerate(nodes.tolist()):
+            i, j = divmod(cell, width)
+            self.tile_nodes.setdefault((i // tile_size, j // tile_size), []).append(node)
+
+    @staticmethod
+    def grid_digest(maze):
+
+        """
+        Restituisce l'hash SHA-256 di dimensioni e pesi della matrice del labirinto.
+        """
+
+        digest = hashlib.sha256()
+        digest.update(np.array(maze.maze.shape, dtype=np.int64).tobytes())
+        digest.update(np.ascontiguousarray(maze.maze, dtype=np.uint8).tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def find_entrances(grid, tile_size):
+
+        """
+        Questo metodo individua gli ingressi tra tessere adiacenti. Lungo ogni bordo, i tratti
+        di caselle percorribili affacciate su entrambi i lati vengono separati ai confini delle
+        tessere; ogni tratto riceve un ingresso al centro oppure, se lungo almeno
+        LONG_ENTRANCE caselle, uno per estremo.
+
+        Parameters
+        ----------
+        grid : numpy.ndarray
+            Matrice del labirinto
+
+        tile_size : int
+            Lato delle tessere
+
+        Returns
+        -------
+        entrances : list
+            Coppie di caselle ((i, j), (i, j)) affacciate su tessere adiacenti.
+        """
+
+        height, width = grid.shape
+        passable = grid != 0
+        entrances = []
+        # Bordi verticali (tra colonne col - 1 e col) e orizzontali (tra righe row - 1 e row)
+        for vertical, size, length in ((True, width, height), (False, height, width)):
+            for border in range(tile_size, size, tile_size):
+                if vertical:
+                    open_cells = passable[:, border - 1] & passable[:, border]
+                else:
+                    open_cells = passable[border - 1, :] & passable[border, :]
+                # Un tratto inizia dopo una casella chiusa o al confine di una tessera
+                begins = open_cells.copy()
+                begins[1:] &= ~open_cells[:-1]
+                begins[::tile_size] = open_cells[::tile_size]
+                for first in np.flatnonzero(begins).tolist():
+                    # Il tratto termina alla prima casella chiusa o al confine della tessera
+                    limit = min(length, (first // tile_size + 1) * tile_size)
+                    last = first
+                    while last + 1 < limit and open_cells[last + 1]:
+                        last += 1
+                    if last - first + 1 >= LONG_ENTRANCE:
+                        chosen = (first, last)
+                    else:
+                        chosen = ((first + last) // 2,)
+                    for k in chosen:
+                        if vertical:
+                            entrances.append(((k, border - 1), (k, border)))
+                        else:
+                            entrances.append(((border - 1, k), (border, k)))
+        return entrances
+
+    @classmethod
+    def build(cls, maze, tile_size=32, workers=None):
+
+        """
+        Questo metodo costruisce il grafo astratto del labirinto. Gli archi interni delle
+        tessere, la parte più costosa, vengono calcolati in parallelo su un pool di processi,
+        una fascia di tessere per ogni lavoro.
+
+        Parameters
+        ----------
+        maze : Maze
+            Labirinto da astrarre
+
+        tile_size : int
+            Lato delle tessere
+
+        workers : int
+            Numero di processi da utilizzare (di default il numero di CPU; con 1 il calcolo
+            avviene nel processo corrente)
+
+        Returns
+        -------
+        abstraction : TileAbstraction
+            Grafo astratto del labirinto.
+        """
+
+        if tile_size < 2:
+            raise ValueError("Il lato delle tessere deve essere almeno 2")
+        grid = np.ascontiguousarray(maze.maze, dtype=np.uint8)
+        height, width = grid.shape
+        weights = grid.reshape(-1)
+        entrances = cls.find_entrances(grid, tile_size)
+
+        # Archi tra ingressi affacciati: il peso è quello della casella in cui si entra
+        edges = []
+        tiles = {}
+        for a, b in entrances:
+            edges.append((a, b, int(weights[b[0] * width + b[1]])))
+            edges.append((b, a, int(weights[a[0] * width + a[1]])))
+            for cell in (a, b):
+                band = tiles.setdefault(cell[0] // tile_size, {})
+                band.setdefault(cell[1] // tile_size, set()).add(cell)
+
+        # Archi interni delle tessere, calcolati per fasce di righe
+        jobs = [(grid[band * tile_size:(band + 1) * tile_size], band * tile_size, tile_size,
+                 {col: sorted(cells) for col, cells in columns.items()})
+                for band, columns in sorted(tiles.items())]
+        if workers == 1:
+            results = [band_edges(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(band_edges, *zip(*jobs))) if jobs else []
+        for result in results:
+            edges.extend(result)
+
+        # Conversione in formato CSR, con i nodi ordinati per indice piatto
+        cells = sorted({a[0] * width + a[1] for a, _, _ in edges} | {b[0] * width + b[1] for _, b, _ in edges})
+        nodes = np.array(cells, dtype=np.int64)
+        node_of = {cell: node for node, cell in enumerate(cells)}
+        source = np.array([node_of[a[0] * width + a[1]] for a, _, _ in edges], dtype=np.int64)
+        target = np.array([node_of[b[0] * width + b[1]] for _, b, _ in edges], dtype=np.int64)
+        cost = np.array([c for _, _, c in edges], dtype=np.int64)
+        order = np.argsort(source, kind="stable")
+        offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=len(nodes)), out=offsets[1:])
+        return cls(tile_size, grid.shape, cls.grid_digest(maze), nodes, offsets, target[order], cost[order])
+
+    def save(self, filepath):
+
+        """
+        Salva il grafo astratto in un file .npz, per riutilizzarlo in esecuzioni successive.
+        """
+
+        with open(filepath, "wb") as f:
+            np.savez(f, tile_size=self.tile_size, shape=np.array(self.shape), digest=np.array(self.digest),
+                     nodes=self.nodes, offsets=self.offsets, targets=self.targets, costs=self.costs)
+
+    @classmethod
+    def load(cls, filepath, maze):
+
+        """
+        Carica un grafo astratto salvato con save, verificando che sia stato calcolato
+        sullo stesso labirinto.
+
+        Parameters
+        ----------
+        filepath : str
+            Path del file .npz
+
+        maze : Maze
+            Labirinto a cui si riferisce il grafo
+
+        Returns
+        -------
+        abstraction : TileAbstraction
+            Grafo astratto del labirinto.
+        """
+
+        with np.load(filepath) as data:
+            abstraction = cls(int(data["tile_size"]), tuple(int(n) for n in data["shape"]), str(data["digest"]),
+                              data["nodes"], data["offsets"], data["targets"], data["costs"])
+        if abstraction.digest != cls.grid_digest(maze):
+            raise ValueError("Il grafo astratto non corrisponde al labirinto")
+        return abstraction
+
+    def tile_bounds(self, cell):
+
+        """
+        Restituisce riga e colonna dell'angolo in alto a sinistra e dimensioni della
+        tessera che contiene la casella cell = (i, j).
+        """
+
+        height, width = self.shape
+        row = cell[0] // self.tile_size * self.tile_size
+        col = cell[1] // self.tile_size * self.tile_size
+        return row, col, min(self.tile_size, height - row), min(self.tile_size, width - col)
+
+
+class HierarchicalPath:
+    def __init__(self, maze, abstraction=None, tile_size=32, workers=None):
+
+        """
+        Costruttore della classe HierarchicalPath, che calcola con HPA* i percorsi di tutte
+        le caselle di partenza verso l'arrivo. Gli attributi paths, weight, expanded e
+        stats hanno lo stesso formato di quelli di Path.
+
+        Parameters
+        ----------
+        maze : Maze
+            Contiene il labirinto da risolvere
+
+        abstraction : TileAbstraction
+            Grafo astratto già calcolato (ad esempio caricato con TileAbstraction.load);
+            se assente viene costruito con tile_size e workers
+
+        tile_size : int
+            Lato delle tessere
+
+        workers : int
+            Numero di processi per il calcolo del grafo astratto
+
+        Returns
+        -------
+        None.
+        """
+
+        if abstraction is None:
+            abstraction = TileAbstraction.build(maze, tile_size, workers)
+        elif abstraction.shape != maze.maze.shape:
+            raise ValueError("Il grafo astratto non corrisponde al labirinto")
+        self.abstraction = abstraction
+        self.maze = maze
+        self.grid = np.asarray(maze.maze)
+        # La ricerca sul grafo astratto è più veloce su liste Python che su array numpy
+        self.nodes = abstraction.nodes.tolist()
+        self.offsets = abstraction.offsets.tolist()
+        self.targets = abstraction.targets.tolist()
+        self.costs = abstraction.costs.tolist()
+
+        self.paths = []
+        self.weight = []
+        self.expanded = 0
+        self.stats = []
+        for start in maze.start:
+            path, weight = self.find_path(tuple(start))
+            self.paths.append(path)
+            self.weight.append(weight)
+
+    def tile_of(self, cell):
+
+        """
+        Restituisce la matrice della tessera che contiene cell e la posizione del suo angolo.
+        """
+
+        row, col, height, width = self.abstraction.tile_bounds(cell)
+        return self.grid[row:row + height, col:col + width], row, col
+
+    def find_path(self, start):
+
+        """
+        Questo metodo calcola il percorso da start all'arrivo: collega start e arrivo agli
+        ingressi delle rispettive tessere, svolge una ricerca di Dijkstra sul grafo astratto
+        e ricostruisce il percorso casella per casella.
+
+        Parameters
+        ----------
+        start : tuple
+            Casella di partenza
+
+        Returns
+        -------
+        path : list
+            Percorso dalla partenza all'arrivo (None se non esiste).
+
+        weight : int
+            Peso del percorso (0 se non esiste).
+        """
+
+        abstraction = self.abstraction
+        end = tuple(self.maze.end)
+        if start == end:
+            self.stats.append(self.record_search(0, 0, 0))
+            return [start], 0
+        if not self.maze.reachable(start):
+            self.stats.append(self.record_search(0, 0, 0))
+            return None, 0
+
+        width = abstraction.shape[1]
+        nodes, offsets, targets, costs = self.nodes, self.offsets, self.targets, self.costs
+        size = len(nodes)
+        # Due nodi temporanei rappresentano partenza e arrivo
+        source, target = size, size + 1
+
+        # Archi dalla partenza agli ingressi della sua tessera (e all'arrivo, se nella stessa tessera).
+        # Una partenza su un muro si collega invece tramite le caselle adiacenti percorribili,
+        # ognuna con gli ingressi della propria tessera (che può essere diversa da quella della
+        # partenza) e con il peso per entrarvi: origin_of conserva la casella usata per ogni arco
+        end_tile = (end[0] // abstraction.tile_size, end[1] // abstraction.tile_size)
+        if self.grid[start]:
+            origins = [(start, 0)]
+        else:
+            height = abstraction.shape[0]
+            origins = [((x, y), int(self.grid[x, y])) for x, y in ((start[0] - 1, start[1]), (start[0] + 1, start[1]),
+                                                                   (start[0], start[1] - 1), (start[0], start[1] + 1))
+                       if 0 <= x < height and 0 <= y < width and self.grid[x, y]]
+        start_cost = {}
+        origin_of = {}
+        for origin, extra in origins:
+            tile, row, col = self.tile_of(origin)
+            tile_width = tile.shape[1]
+            distance, _ = tile_search(tile, (origin[0] - row) * tile_width + origin[1] - col)
+            origin_tile = (origin[0] // abstraction.tile_size, origin[1] // abstraction.tile_size)
+            candidates = [(node, divmod(nodes[node], width)) for node in abstraction.tile_nodes.get(origin_tile, [])]
+            if origin_tile == end_tile:
+                candidates.append((target, end))
+            for node, (i, j) in candidates:
+                cost = distance[(i - row) * tile_width + j - col] + extra
+                if cost < start_cost.get(node, INFINITY):
+                    start_cost[node] = cost
+                    origin_of[node] = origin
+        start_edges = list(start_cost.items())
+
+        # Archi dagli ingressi della tessera dell'arrivo verso l'arrivo
+        tile, row, col = self.tile_of(end)
+        tile_width = tile.shape[1]
+        distance, _ = tile_search(tile, (end[0] - row) * tile_width + end[1] - col, reverse=True)
+        end_cost = {}
+        for node in abstraction.tile_nodes.get(end_tile, []):
+            i, j = divmod(nodes[node], width)
+            cost = distance[(i - row) * tile_width + j - col]
+            if cost != INFINITY:
+                end_cost[node] = cost
+
+        # Ricerca di Dijkstra sul grafo astratto
+        visited = {source: 0}
+        predecessor = {source: -1}
+        queue = [(0, source)]
+        popped = expanded = peak_queue = 0
+        while queue:
+            peak_queue = max(peak_queue, len(queue))
+            curr_weight, curr_node = heapq.heappop(queue)
+            popped += 1
+            if curr_weight > visited[curr_node]:
+                continue
+            expanded += 1
+            if curr_node == target:
+                break
+            if curr_node == source:
+                neighbours = start_edges
+            else:
+                begin, stop = offsets[curr_node], offsets[curr_node + 1]
+                neighbours = list(zip(targets[begin:stop], costs[begin:stop]))
+                if curr_node in end_cost:
+                    neighbours.append((target, end_cost[curr_node]))
+            for next_node, cost in neighbours:
+                new_weight = curr_weight + cost
+                if new_weight < visited.get(next_node, INFINITY):
+                    visited[next_node] = new_weight
+                    predecessor[next_node] = curr_node
+                    heapq.heappush(queue, (new_weight, next_node))
+        self.stats.append(self.record_search(expanded, popped + len(queue), peak_queue))
+        if target not in visited:
+            return None, 0
+
+        # Caselle dei nodi del percorso astratto, dalla partenza all'arrivo
+        waypoints = []
+        node = target
+        following = -1
+        while node != -1:
+            if node == source:
+                # La casella adiacente da cui è uscita una partenza su un muro
+                if origin_of[following] != start:
+                    waypoints.append(origin_of[following])
+                waypoints.append(start)
+            elif node == target:
+                waypoints.append(end)
+            else:
+                waypoints.append(divmod(nodes[node], width))
+            following, node = node, predecessor[node]
+        waypoints.reverse()
+        return self.refine(waypoints), visited[target]
+
+    def refine(self, waypoints):
+
+        """
+        Questo metodo ricostruisce le caselle del percorso: due nodi consecutivi in tessere
+        adiacenti sono caselle affacciate, mentre tra due nodi della stessa tessera si
+        ripete la ricerca all'interno della sola tessera, ricostruendone il tratto.
+
+        Parameters
+        ----------
+        waypoints : list
+            Caselle dei nodi del percorso astratto
+
+        Returns
+        -------
+        path : list
+            Percorso completo, casella per casella.
+        """
+
+        tile_size = self.abstraction.tile_size
+        path = [waypoints[0]]
+        for a, b in zip(waypoints, waypoints[1:]):
+            if (a[0] // tile_size, a[1] // tile_size) != (b[0] // tile_size, b[1] // tile_size):
+                path.append(b)
+                continue
+            tile, row, col = self.tile_of(a)
+            tile_width = tile.shape[1]
+            curr_pos = (b[0] - row) * tile_width + b[1] - col
+            _, predecessor = tile_search(tile, (a[0] - row) * tile_width + a[1] - col, goal=curr_pos)
+            segment = []
+            while predecessor[curr_pos] != -1:
+                i, j = divmod(curr_pos, tile_width)
+                segment.append((row + i, col + j))
+                curr_pos = predecessor[curr_pos]
+            segment.reverse()
+            path.extend(segment)
+        return path
+
+    def record_search(self, expanded, pushes, peak_queue):
+
+        """
+        Registra le statistiche di una ricerca sul grafo astratto, come Path.record_search.
+        """
+
+        self.expanded += expanded
+        return {"expanded": expanded, "pushes": pushes, "peak_queue": peak_queue}
@@ -0,0 +1,227 @@
+import heapq
+
+# Peso provvisorio delle caselle non ancora raggiunte
+INFINITY = float("inf")
+
+
+class IncrementalPath:
+    def __init__(self, maze):
+
+        """
+        Costruttore della classe IncrementalPath, che calcola i percorsi a peso minimo
+        di tutte le caselle di partenza come Path ma mantiene lo stato della ricerca,
+        in modo da aggiornare i percorsi quando si modificano muri o pesi del labirinto
+        senza ripartire da zero.
+
+        La ricerca segue lo schema di LPA* (Lifelong Planning A*) sul labirinto percorso
+        al contrario, a partire dalla casella di arrivo: per ogni casella si mantengono
+        g, il peso minimo noto per raggiungere l'arrivo, e rhs, la stima ricavata dalle
+        caselle adiacenti. Dopo una modifica vengono rielaborate solo le caselle in cui
+        g e rhs non coincidono più, quindi il lavoro è proporzionale alla regione del
+        labirinto influenzata dalla modifica.
+
+        Parameters
+        ----------
+        maze : Maze
+            Contiene il labirinto da risolvere, che può essere modificato con i metodi
+            set_cost, set_wall e clear_wall di questa classe
+
+        Returns
+        -------
+        None.
+        """
+
+        self.maze = maze
+        self.height, self.width = maze.maze.shape
+        size = self.height * self.width
+        self.target = maze.cell_index(maze.end)
+        self.sources = [maze.cell_index(start) for start in maze.start]
+        self.source_set = set(self.sources)
+
+        # g e rhs di ogni casella, indicizzate per indice piatto
+        self.g = [INFINITY] * size
+        self.rhs = [INFINITY] * size
+        self.rhs[self.target] = 0
+        # Coda con priorità delle caselle inconsistenti (g diverso da rhs)
+        self.queue = [(0, self.target)]
+        # Il controllo della terminazione dipende dai valori delle partenze: va ripetuto solo
+        # quando uno di essi cambia
+        self.sources_changed = True
+        self.bound = INFINITY
+        self.sources_settled = False
+
+        # expanded conta i nodi elaborati dall'ultimo aggiornamento
+        self.expanded = 0
+        self.paths = []
+        self.weight = []
+        self.compute_shortest_paths()
+
+    def set_cost(self, pos, weight):
+
+        """
+        Modifica il peso della casella pos (0 per un muro) e aggiorna i percorsi.
+        """
+
+        self.maze.set_cost(pos, weight)
+        self.update([pos])
+
+    def set_wall(self, pos):
+
+        """
+        Trasforma la casella pos in un muro e aggiorna i percorsi.
+        """
+
+        self.maze.set_wall(pos)
+        self.update([pos])
+
+    def clear_wall(self, pos, weight=1):
+
+        """
+        Rende percorribile la casella pos con il peso indicato e aggiorna i percorsi.
+        """
+
+        self.maze.clear_wall(pos, weight)
+        self.update([pos])
+
+    def update(self, positions):
+
+        """
+        Questo metodo aggiorna i percorsi dopo che il peso delle caselle indicate è stato
+        modificato (anche direttamente tramite i metodi di Maze).
+        Il peso di una casella è il costo per entrarvi, per cui cambiano solo le stime rhs
+        delle caselle adiacenti a quelle modificate (e della casella stessa, se è diventata
+        o ha smesso di essere un muro).
+
+        Parameters
+        ----------
+        positions : list
+            Caselle il cui peso è stato modificato
+
+        Returns
+        -------
+        None.
+        """
+
+        self.weights = memoryview(self.maze.maze.reshape(-1))
+        for pos in positions:
+            changed = self.maze.cell_index(pos)
+            for cell in [changed] + self.neighbours(changed):
+                self.update_cell(cell)
+        self.compute_shortest_paths()
+
+    def neighbours(self, cell):
+
+        """
+        Restituisce gli indici delle caselle adiacenti a cell interne al labirinto.
+        """
+
+        i, j = divmod(cell, self.width)
+        result = []
+        if i > 0:
+            result.append(cell - self.width)
+        if i < self.height - 1:
+            result.append(cell + self.width)
+        if j > 0:
+            result.append(cell - 1)
+        if j < self.width - 1:
+            result.append(cell + 1)
+        return result
+
+    def update_cell(self, cell):
+
+        """
+        Questo metodo ricalcola la stima rhs della casella cell come minimo, tra le
+        caselle adiacenti percorribili, del peso per entrarvi più il loro valore g,
+        e la inserisce nella coda se è diventata inconsistente.
+        """
+
+        if cell != self.target:
+            weights = self.weights
+            rhs = INFINITY
+            # Nei muri non si entra, per cui serve calcolarne il peso solo se sono partenze:
+            # come in Path, da una partenza su un muro ci si sposta nelle caselle adiacenti
+            if weights[cell] or cell in self.source_set:
+                for near in self.neighbours(cell):
+                    if weights[near] and weights[near] + self.g[near] < rhs:
+                        rhs = weights[near] + self.g[near]
+            self.rhs[cell] = rhs
+            if cell in self.source_set:
+                self.sources_changed = True
+        if self.g[cell] != self.rhs[cell]:
+            heapq.heappush(self.queue, (min(self.g[cell], self.rhs[cell]), cell))
+
+    def compute_shortest_paths(self):
+
+        """
+        Questo metodo elabora le caselle inconsistenti in ordine di priorità finché
+        tutte le caselle di partenza sono consistenti e nessuna casella in coda ha una
+        priorità inferiore alla loro, quindi ricostruisce i percorsi.
+
+        Returns
+        -------
+        None.
+        """
+
+        self.weights = memoryview(self.maze.maze.reshape(-1))
+        g, rhs, queue = self.g, self.rhs, self.queue
+        expanded = 0
+        while queue:
+            key, cell = queue[0]
+            # Gli elementi non più inconsistenti o con priorità superata vengono scartati
+            if g[cell] == rhs[cell] or key != min(g[cell], rhs[cell]):
+                heapq.heappop(queue)
+                continue
+            # Si ricalcola la condizione di terminazione solo se le partenze sono cambiate
+            if self.sources_changed:
+                self.bound = max((min(g[s], rhs[s]) for s in self.sources), default=0)
+                self.sources_settled = all(g[s] == rhs[s] for s in self.sources)
+                self.sources_changed = False
+            if key >= self.bound and self.sources_settled:
+                break
+            heapq.heappop(queue)
+            expanded += 1
+            if cell in self.source_set:
+                self.sources_changed = True
+            if g[cell] > rhs[cell]:
+                # La casella ha un peso minore di quello noto: lo si fissa e lo si propaga
+                g[cell] = rhs[cell]
+            else:
+                # Il peso della casella è aumentato: lo si invalida e la si rielabora
+                g[cell] = INFINITY
+                self.update_cell(cell)
+            for near in self.neighbours(cell):
+                self.update_cell(near)
+        self.expanded = expanded
+        self.paths, self.weight = self.extract_paths()
+
+    def extract_paths(self):
+
+        """
+        Questo metodo ricostruisce il percorso di ogni casella di partenza scendendo,
+        ad ogni passo, nella casella adiacente che realizza il peso minimo verso l'arrivo.
+
+        Returns
+        -------
+        paths : list
+            Percorso di ogni partenza (None se non esiste alcun percorso).
+
+        weights : list
+            Peso di ogni percorso (0 se non esiste alcun percorso).
+        """
+
+        paths = []
+        weights = []
+        for source in self.sources:
+            if self.g[source] == INFINITY:
+                paths.append(None)
+                weights.append(0)
+                continue
+            cell = source
+            path = [self.maze.cell_position(cell)]
+            while cell != self.target:
+                cell = min((near for near in self.neighbours(cell) if self.weights[near]),
+                           key=lambda near: self.weights[near] + self.g[near])
+                path.append(self.maze.cell_position(cell))
+            paths.append(path)
+            weights.append(self.g[source])
+        return paths, weights
@@ -1,8 +1,13 @@
+import sys
+
 from maze import Maze
 from path import Path
 from output import output_generation
 
 if __name__ == '__main__':
+  # Con l'opzione --solve-only si salvano solo le informazioni sui percorsi, senza immagini e Gif
+  solve_only = "--solve-only" in sys.argv[1:]
+
   # Richiede in input il file da elaborare
   filepath = input("Inserisci il percorso del file (.json/.tiff/.png/.jpeg): ").strip()
 
@@ -11,4 +16,4 @@ if __name__ == '__main__':
   p = Path(m)
 
   # Una volta calcolati i percorsi, si richiama la funzione output_generation per ottenere i file di output
-  output_generation(filepath,p.paths,p.weight,m)
+  output_generation(filepath,p.paths,p.weight,m,draw=not solve_only)
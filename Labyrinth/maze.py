@@ -1,10 +1,30 @@
 import os
 import json
-from PIL import Image
+import struct
+from itertools import chain
+import numpy as np
+
+# Intestazione del formato binario: identificativo, versione, campo riservato, altezza,
+# larghezza, riga e colonna dell'arrivo, numero di partenze. Seguono le coppie (riga, colonna)
+# delle partenze e infine la matrice dei pesi, una riga dopo l'altra, un byte per casella.
+BINARY_MAGIC = b"LABY"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHHIIIII")
+BINARY_POSITION = struct.Struct("<II")
+
+# Colore RGB di ogni peso di casella, utilizzato per generare l'immagine del labirinto:
+# 0 = muro nero, 1 = cammino bianco, da 2 a 16 = cammino pesato in scala di grigi
+WEIGHT_COLORS = np.zeros((256, 3), dtype=np.uint8)
+WEIGHT_COLORS[1] = 255
+WEIGHT_COLORS[2:] = np.minimum((np.arange(2, 256) - 1) * 16, 255)[:, None]
 
 
 class Maze:
-    def __init__(self, filepath):
+    # Senza il dizionario degli attributi ogni istanza occupa meno memoria
+    __slots__ = ("maze", "start", "end", "_image", "adjacency_offsets", "adjacency_targets",
+                 "corridor_graph", "component_labels", "search_buffers")
+
+    def __init__(self, filepath, profiler=None):
         
         """
         Costruttore della classe Maze
@@ -13,24 +33,45 @@ class Maze:
         filepath : str
             Path del file di input
 
+        profiler : Profiler
+            Se presente, misura il tempo di caricamento del labirinto
+
         Returns
         -------
         None.
         """
         
-        # Inizializziamo i quattro attributi della classe:
+        # Inizializziamo gli attributi della classe:
 
-        # maze conterrà la matrice che rappresenta il labirinto
-        self.maze = []
+        # maze conterrà la matrice (array NumPy di uint8) che rappresenta il labirinto
+        self.maze = np.zeros((0, 0), dtype=np.uint8)
         # start è la lista di tutte le caselle di partenza
         self.start = []
         # end è la tupla rappresentante la casella di arrivo
         self.end = ()
-        # image contiene invece l'immagine rappresentante il labirinto
-        self.image = None
+        # _image contiene invece l'immagine rappresentante il labirinto: per i file JSON e
+        # binari viene generata solo al primo accesso alla proprietà image
+        self._image = None
+        # Tabella delle adiacenze in formato CSR, calcolata una sola volta al primo utilizzo:
+        # le caselle sono identificate dall'indice i * larghezza + j e le adiacenti della
+        # casella c sono adjacency_targets[adjacency_offsets[c]:adjacency_offsets[c + 1]]
+        self.adjacency_offsets = None
+        self.adjacency_targets = None
+        # Grafo dei corridoi contratti, calcolato anch'esso al primo utilizzo (vedi build_corridor_graph)
+        self.corridor_graph = None
+        # Etichetta della componente connessa di ogni casella percorribile (-1 per i muri),
+        # calcolata al primo utilizzo (vedi build_components)
+        self.component_labels = None
+        # Liste dei pesi minimi e dei predecessori già riportate ai valori iniziali, lasciate
+        # dalle ricerche di Path per essere riutilizzate dalle successive (vedi Path.search_arrays)
+        self.search_buffers = []
 
         # Si richiama il metodo load_maze
-        self.load_maze(filepath)
+        if profiler is None:
+            self.load_maze(filepath)
+        else:
+            with profiler.stage("load"):
+                self.load_maze(filepath)
 
     def load_maze(self, filepath):
         
@@ -52,6 +93,8 @@ class Maze:
         _, file_ext = os.path.splitext(os.path.basename(filepath))
         # Se è un file immagine richiama il metodo image_to_maze
         if file_ext in [".tiff", ".jpeg", ".png"]:
+            # Pillow viene importato solo quando serve, per non rallentare chi usa solo JSON
+            from PIL import Image
             # Apre l'immagine del labirinto
             self.image = Image.open(filepath)
             self.image_to_maze()
@@ -62,6 +105,9 @@ class Maze:
             with open(filepath) as json_file:
                 data = json.load(json_file)
             self.json_to_maze(data)
+        # Se è un file nel formato binario richiama la funzione binary_to_maze
+        elif file_ext == ".maze":
+            self.binary_to_maze(filepath)
         # In qualsiasi altro caso, genera un errore in quanto il formato non è supportato
         else:
             raise ValueError("Formato file non supportato")
@@ -81,38 +127,36 @@ class Maze:
               modo il peso di una casella
         """
         
-        # Converte l'immagine in una matrice di pixel
-        pixels = self.image.load()
-        # Inizializzo il numero di caselle rosse trovate nel labirinto
-        red_cell = 0
-        # Scansiona i pixel dell'immagine per creare la matrice del labirinto
-        for i in range(self.image.height):
-            maze_row = []
-            for j in range(self.image.width):
-                pixel = pixels[j, i]
-                # Si converte il pixel in un numero, 0 se è un muro, 1 altrimenti
-                if pixel == (255, 255, 255):
-                    maze_row.append(1)
-                elif pixel == (0, 0, 0):  # Pixel nero
-                    maze_row.append(0)
-                elif pixel == (0, 255, 0):  # Pixel verde
-                    maze_row.append(1)
-                    self.start.append((i, j))
-                elif pixel == (255, 0, 0):  # Pixel rosso
-                    red_cell += 1
-                    maze_row.append(1)
-                    self.end = (i, j)
-                elif pixel[0] == pixel[1] == pixel[2]:
-                    # in tal caso utilizziamo il valore del pixel come peso
-                    # infatti i pixel grigi sono sempre nella forma (x,x,x)
-                    # si somma 1 così nel caso del pixel (16,16,16) si ottiene un peso pari a 2
-                    # poiché il peso 1 è attribuito alle caselle bianche
-                    maze_row.append((pixel[0] // 16) + 1)
-                # Se vi è un pixel diverso da tutti i casi precedenti allora si produce un errore,
-                # poiché il labirinto non è rappresentato correttamente.
-                else:
-                    raise ValueError("L'immagine fornita non rappresenta correttamente il labirinto.")
-            self.maze.append(maze_row)
+        # Converte l'immagine in un array di pixel RGB di dimensioni (altezza, larghezza, 3)
+        pixels = np.asarray(self.image.convert("RGB"), dtype=np.uint8)
+        red, green, blue = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+
+        # Si classificano tutti i pixel contemporaneamente tramite maschere booleane:
+        # i pixel grigi sono sempre nella forma (x,x,x), e comprendono anche il bianco e il nero
+        gray_mask = (red == green) & (green == blue)
+        start_mask = (red == 0) & (green == 255) & (blue == 0)  # Pixel verdi
+        end_mask = (red == 255) & (green == 0) & (blue == 0)  # Pixel rossi
+
+        # Se vi è un pixel diverso da tutti i casi precedenti allora si produce un errore,
+        # poiché il labirinto non è rappresentato correttamente.
+        if not np.all(gray_mask | start_mask | end_mask):
+            raise ValueError("L'immagine fornita non rappresenta correttamente il labirinto.")
+
+        # Per i pixel grigi si utilizza il valore del pixel come peso:
+        # si somma 1 così nel caso del pixel (16,16,16) si ottiene un peso pari a 2
+        # poiché il peso 1 è attribuito alle caselle bianche
+        maze = red // 16 + 1
+        maze[red == 255] = 1  # Pixel bianchi, verdi e rossi
+        maze[gray_mask & (red == 0)] = 0  # Pixel neri
+        self.maze = np.ascontiguousarray(maze, dtype=np.uint8)
+
+        # Le caselle di partenza e quella di arrivo si ricavano dalle rispettive maschere,
+        # nello stesso ordine (per righe) in cui compaiono nell'immagine
+        self.start = [(int(i), int(j)) for i, j in np.argwhere(start_mask)]
+        end_cells = np.argwhere(end_mask)
+        red_cell = len(end_cells)
+        if red_cell > 0:
+            self.end = (int(end_cells[-1][0]), int(end_cells[-1][1]))
             
         # Verifica della presenza di almeno un punto di partenza
         if len(self.start) < 1:
@@ -139,6 +183,10 @@ class Maze:
             - un numero da 2 a 16 se la casella è una tonalità di grigio, rappresentando in questo
               modo il peso di una casella
 
+        Pareti e costi vengono scritti sulla matrice con operazioni vettoriali, dopo aver
+        verificato che contengano solo interi e che siano interni al labirinto: in caso
+        contrario si genera un ValueError che indica il campo non valido.
+
         Parameters
         ----------
         data : dict
@@ -150,48 +198,208 @@ class Maze:
         """
         
         # Verifica che la struttura del file JSON sia effettivamente quella supportata dal programma
-        if set(list(data.keys())) != {"larghezza", "altezza", "pareti", "iniziali", "finale", "costi"}:
+        if not isinstance(data, dict) or set(data.keys()) != {"larghezza", "altezza", "pareti", "iniziali", "finale", "costi"}:
+            raise ValueError("Struttura file JSON non supportata")
+        height, width = data["altezza"], data["larghezza"]
+        if type(height) is not int or type(width) is not int or height < 1 or width < 1:
+            raise ValueError("Le dimensioni del labirinto devono essere interi positivi")
+        if not isinstance(data["pareti"], list) or not isinstance(data["costi"], list):
             raise ValueError("Struttura file JSON non supportata")
-        
-        for i in range(data["altezza"]):
-            maze_row = []
-            for j in range(data["larghezza"]):
-                maze_row.append(1)
-            self.maze.append(maze_row)
-
-        # Popola la matrice con le pareti
-        for wall in data["pareti"]:
-            # Verifica che la struttura del file JSON sia effettivamente quella supportata dal programma
-            if set(list(wall.keys())) != {"orientamento", "posizione", "lunghezza"}:
-                raise ValueError("Struttura file JSON non supportata")
-                
-            if wall["orientamento"] == "H":
-                for i in range(wall["lunghezza"]):
-                    self.maze[wall["posizione"][0]][wall["posizione"][1] + i] = 0
-            elif wall["orientamento"] == "V":
-                for i in range(wall["lunghezza"]):
-                    self.maze[wall["posizione"][0] + i][wall["posizione"][1]] = 0
+
+        # Crea una matrice di caselle percorribili delle dimensioni del labirinto
+        self.maze = np.ones((height, width), dtype=np.uint8)
+
+        # Popola la matrice con le pareti: tutte le caselle dei segmenti vengono calcolate
+        # insieme e azzerate con un'unica assegnazione
+        walls = data["pareti"]
+        # Verifica che la struttura del file JSON sia effettivamente quella supportata dal programma:
+        # ogni parete deve avere esattamente le tre chiavi lette qui sotto
+        try:
+            orientations = np.array([wall["orientamento"] for wall in walls], dtype=object)
+            wall_positions = [wall["posizione"] for wall in walls]
+            wall_lengths = [wall["lunghezza"] for wall in walls]
+            if set(map(len, walls)) - {3}:
+                raise KeyError
+        except (KeyError, TypeError):
+            raise ValueError("Struttura file JSON non supportata") from None
+        vertical = orientations == "V"
+        if not np.all(vertical | (orientations == "H")):
+            raise ValueError("L'orientamento delle pareti deve essere 'H' o 'V'")
+        positions = self.json_integers(wall_positions, 2, "posizione delle pareti")
+        lengths = self.json_integers(wall_lengths, 0, "lunghezza delle pareti")
+        if np.any(lengths < 0):
+            raise ValueError("La lunghezza delle pareti non può essere negativa")
+        # Ultima casella di ogni segmento (solo per quelli non vuoti)
+        filled = lengths > 0
+        last_i = positions[:, 0] + np.where(vertical, lengths - 1, 0)
+        last_j = positions[:, 1] + np.where(vertical, 0, lengths - 1)
+        if np.any(filled & ((positions[:, 0] < 0) | (positions[:, 1] < 0) | (last_i >= height) | (last_j >= width))):
+            raise ValueError("Le pareti devono essere interne al labirinto")
+        # Indice del segmento e posizione all'interno del segmento di ogni casella di muro
+        segment = np.repeat(np.arange(len(lengths)), lengths)
+        step = np.arange(len(segment)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        rows = positions[segment, 0] + np.where(vertical[segment], step, 0)
+        cols = positions[segment, 1] + np.where(vertical[segment], 0, step)
+        self.maze[rows, cols] = 0
 
         # Popola con le posizioni iniziali
-        for iniziale in data["iniziali"]:
-            i = iniziale[0]
-            j = iniziale[1]
-            self.start.append((i, j))
+        starts = self.json_integers(data["iniziali"], 2, "posizioni iniziali")
+        if len(starts) < 1:
+            raise ValueError("Il file fornito non presenta alcun punto di partenza.")
+        self.start = [(int(i), int(j)) for i, j in starts]
 
         # Popola con la posizione di arrivo
-        i = data["finale"][0][0]
-        j = data["finale"][0][1]
-        self.end = (i, j)
+        finals = self.json_integers(data["finale"], 2, "posizione finale")
+        if len(finals) < 1:
+            raise ValueError("Il file fornito non presenta alcun punto di fine.")
+        self.end = (int(finals[0][0]), int(finals[0][1]))
+
+        for i, j in self.start + [self.end]:
+            if not (0 <= i < height and 0 <= j < width):
+                raise ValueError("Le posizioni di partenza e arrivo devono essere interne al labirinto")
+
+        # Popolo con le caselle in scala di grigi, con un'unica assegnazione indicizzata
+        costs = self.json_integers(data["costi"], 3, "costi")
+        if np.any((costs[:, 0] < 0) | (costs[:, 0] >= height) | (costs[:, 1] < 0) | (costs[:, 1] >= width)):
+            raise ValueError("Le caselle con un costo devono essere interne al labirinto")
+        if np.any((costs[:, 2] < 0) | (costs[:, 2] > 15)):
+            raise ValueError("Il costo di una casella deve essere compreso tra 0 e 15")
+        # Se una casella compare più volte vale l'ultimo costo indicato, come assegnandoli in ordine
+        cells = costs[:, 0] * width + costs[:, 1]
+        _, last = np.unique(cells[::-1], return_index=True)
+        last = len(cells) - 1 - last
+        self.maze.reshape(-1)[cells[last]] = costs[last, 2] + 1
+
+        # L'immagine del labirinto verrà generata da maze_to_image solo se richiesta (vedi image)
+
+    def json_integers(self, values, columns, name):
 
-        # Popolo con le caselle in scala di grigi
-        for costo in data["costi"]:
-            i = costo[0]
-            j = costo[1]
-            peso = costo[2] + 1
-            self.maze[i][j] = peso
+        """
+        Converte una lista di valori interi (o di liste di columns interi) letta dal
+        file JSON in un array NumPy, verificando che abbia la forma attesa e contenga
+        solo interi.
+
+        Parameters
+        ----------
+        values : list
+            Valori letti dal file JSON
+
+        columns : int
+            Numero di interi di ogni elemento (0 se gli elementi sono interi singoli)
 
-        # Si richiama la funzione maze_to_image in modo da avere l'immagine del labirinto appena generato
-        self.maze_to_image()
+        name : str
+            Nome del campo, utilizzato nel messaggio di errore
+
+        Returns
+        -------
+        array : numpy.ndarray
+            Array di interi a 64 bit, di forma (len(values),) oppure (len(values), columns).
+        """
+
+        if not isinstance(values, list):
+            raise ValueError(f"Struttura file JSON non supportata: {name}")
+        try:
+            # Ogni elemento deve essere una lista di esattamente columns valori
+            if columns and set(map(len, values)) - {columns}:
+                raise ValueError
+            flat = list(chain.from_iterable(values)) if columns else values
+            # I booleani di JSON sono interi per Python, per cui si confronta il tipo esatto
+            if set(map(type, flat)) - {int}:
+                raise ValueError
+            array = np.fromiter(flat, dtype=np.int64, count=len(flat))
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Struttura file JSON non supportata: {name} deve contenere solo interi") from None
+        return array.reshape((len(values), columns) if columns else (len(values),))
+
+    def binary_to_maze(self, filepath):
+
+        """
+        Questa funzione legge un labirinto salvato nel formato binario (estensione .maze):
+        un'intestazione con dimensioni, arrivo e partenze seguita dalla matrice dei pesi,
+        un byte per casella. La matrice non viene decodificata né copiata in memoria ma
+        mappata direttamente dal file con numpy.memmap, per cui il caricamento ha un costo
+        quasi nullo anche per labirinti molto grandi.
+
+        Parameters
+        ----------
+        filepath : str
+            Path del file binario
+
+        Returns
+        -------
+        None.
+        """
+
+        with open(filepath, "rb") as f:
+            header = f.read(BINARY_HEADER.size)
+            if len(header) < BINARY_HEADER.size:
+                raise ValueError("File binario del labirinto non valido")
+            magic, version, _, height, width, end_i, end_j, n_start = BINARY_HEADER.unpack(header)
+            if magic != BINARY_MAGIC:
+                raise ValueError("File binario del labirinto non valido")
+            if version != BINARY_VERSION:
+                raise ValueError("Versione del file binario non supportata")
+            positions = f.read(BINARY_POSITION.size * n_start)
+        if len(positions) < BINARY_POSITION.size * n_start:
+            raise ValueError("File binario del labirinto non valido")
+
+        # La matrice inizia subito dopo l'intestazione e le partenze
+        offset = BINARY_HEADER.size + BINARY_POSITION.size * n_start
+        if os.path.getsize(filepath) != offset + height * width:
+            raise ValueError("Le dimensioni del file binario non corrispondono al labirinto")
+        self.maze = np.memmap(filepath, dtype=np.uint8, mode="r", offset=offset, shape=(height, width))
+
+        self.start = [pos for pos in BINARY_POSITION.iter_unpack(positions)]
+        self.end = (end_i, end_j)
+        # Verifica che partenze e arrivo siano all'interno del labirinto
+        if len(self.start) < 1:
+            raise ValueError("Il file fornito non presenta alcun punto di partenza.")
+        for i, j in self.start + [self.end]:
+            if i >= height or j >= width:
+                raise ValueError("Le posizioni di partenza e arrivo devono essere interne al labirinto")
+
+        # L'immagine del labirinto verrà generata da maze_to_image solo se richiesta (vedi image)
+
+    def save_binary(self, filepath):
+
+        """
+        Questo metodo salva il labirinto nel formato binario letto da binary_to_maze.
+
+        Parameters
+        ----------
+        filepath : str
+            Path del file da scrivere (con estensione .maze)
+
+        Returns
+        -------
+        None.
+        """
+
+        height, width = self.maze.shape
+        with open(filepath, "wb") as f:
+            f.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, 0, height, width,
+                                       self.end[0], self.end[1], len(self.start)))
+            for i, j in self.start:
+                f.write(BINARY_POSITION.pack(i, j))
+            f.write(np.ascontiguousarray(self.maze, dtype=np.uint8).tobytes())
+
+    @property
+    def image(self):
+
+        """
+        Immagine del labirinto (PIL.Image). Per i labirinti letti da un'immagine è
+        quella del file; per i file JSON e binari viene generata con maze_to_image al
+        primo accesso, in modo che chi calcola solo i percorsi non paghi il costo
+        della costruzione dell'immagine né dell'importazione di Pillow.
+        """
+
+        if self._image is None and self.maze.size:
+            self.maze_to_image()
+        return self._image
+
+    @image.setter
+    def image(self, image):
+        self._image = image
 
     def maze_to_image(self):
         
@@ -202,31 +410,26 @@ class Maze:
 
         """
         
-        # Crea un'immagine vuota con le dimensioni della matrice del labirinto
-        self.image = Image.new("RGB", (len(self.maze[0]), len(self.maze)))
-        pixels = self.image.load()
-        # Imposta i pixel dell'immagine in base alla matrice del labirinto
-        for i in range(len(self.maze)):
-            for j in range(len(self.maze[0])):
-                if self.maze[i][j] == 0:
-                    pixels[j, i] = (0, 0, 0)  # Muro = nero
-                elif self.maze[i][j] == 1:
-                    pixels[j, i] = (255, 255, 255)  # Cammino = bianco
-                else:
-                    pixels[j, i] = ((self.maze[i][j] - 1) * 16, (self.maze[i][j] - 1) * 16, (self.maze[i][j] - 1) * 16)  # Cammino pesato = grigio scuro
+        from PIL import Image
+
+        # Si converte l'intera matrice in pixel con la tabella dei colori dei pesi
+        pixels = WEIGHT_COLORS[self.maze]
         i = self.end[0]
         j = self.end[1]
-        pixels[j, i] = (255, 0, 0)
+        pixels[i, j] = (255, 0, 0)
         for st in self.start:
             i = st[0]
             j = st[1]
-            pixels[j, i] = (0, 255, 0)
+            pixels[i, j] = (0, 255, 0)
+        self.image = Image.fromarray(pixels, "RGB")
 
     def get_adjacent_positions(self,pos):
         
         """
         Questa funzione verifica quali tra le 4 posizioni adiacenti alla posizione corrente
         siano uno spazio percorribile e non un muro.
+        Gli algoritmi di ricerca utilizzano la tabella precalcolata da build_adjacency:
+        questo metodo resta disponibile per compatibilità.
         Parameters
         ----------
         pos : tuple
@@ -239,9 +442,394 @@ class Maze:
         """
         
         x, y = pos
+        height, width = self.maze.shape
         adjacent_positions = [(x-1, y), (x+1, y), (x, y-1), (x, y+1)]
         valid_positions = []
         for i,j in adjacent_positions:
-            if i>=0 and j>=0 and i<len(self.maze) and j<len(self.maze[0]) and self.maze[i][j]!=0:
-                valid_positions.append(((i,j),self.maze[i][j]))
+            if i>=0 and j>=0 and i<height and j<width and self.maze[i, j]!=0:
+                # Il peso viene convertito in int per evitare overflow sommando valori uint8
+                valid_positions.append(((i,j),int(self.maze[i, j])))
         return valid_positions
+
+    def build_adjacency(self):
+
+        """
+        Questo metodo calcola, con operazioni vettoriali sulla matrice del labirinto,
+        la tabella delle adiacenze in formato CSR (Compressed Sparse Row).
+        Ogni casella è identificata dal suo indice piatto i * larghezza + j; per ogni
+        casella si memorizzano, nello stesso ordine di get_adjacent_positions (sopra,
+        sotto, sinistra, destra), le caselle adiacenti percorribili.
+        In questo modo gli algoritmi di ricerca lavorano solo su interi, senza creare
+        tuple e liste ad ogni nodo esplorato.
+
+        Returns
+        -------
+        None.
+        """
+
+        height, width = self.maze.shape
+        size = height * width
+        passable = self.maze != 0
+
+        # Per ogni direzione, una maschera indica le caselle che hanno in quella direzione
+        # una casella adiacente percorribile
+        directions = np.zeros((height, width, 4), dtype=bool)
+        directions[1:, :, 0] = passable[:-1, :]  # sopra
+        directions[:-1, :, 1] = passable[1:, :]  # sotto
+        directions[:, 1:, 2] = passable[:, :-1]  # sinistra
+        directions[:, :-1, 3] = passable[:, 1:]  # destra
+        directions = directions.reshape(size, 4)
+
+        # Si utilizzano indici a 32 bit quando sono sufficienti, per risparmiare memoria
+        index_type = np.int32 if 4 * size < 2 ** 31 else np.int64
+        # Scostamento dell'indice piatto per ciascuna direzione
+        deltas = np.array([-width, width, -1, 1], dtype=index_type)
+
+        self.adjacency_offsets = np.zeros(size + 1, dtype=index_type)
+        np.cumsum(directions.sum(axis=1), out=self.adjacency_offsets[1:])
+        # np.nonzero scorre le caselle per righe e, per ogni casella, le direzioni in ordine
+        cells, moves = np.nonzero(directions)
+        self.adjacency_targets = (cells + deltas[moves]).astype(index_type)
+
+    def adjacency(self):
+
+        """
+        Questo metodo restituisce la tabella delle adiacenze e i pesi delle caselle
+        come memoryview, che permettono un accesso agli elementi più rapido
+        degli array NumPy senza doverli copiare.
+        La tabella viene costruita alla prima chiamata e riutilizzata nelle successive.
+
+        Returns
+        -------
+        offsets : memoryview
+            Indice del primo adiacente di ogni casella nella lista targets.
+
+        targets : memoryview
+            Indici piatti delle caselle adiacenti percorribili.
+
+        weights : memoryview
+            Peso di ogni casella, indicizzato con l'indice piatto.
+        """
+
+        if self.adjacency_offsets is None:
+            self.build_adjacency()
+        return (memoryview(self.adjacency_offsets), memoryview(self.adjacency_targets),
+                memoryview(self.maze.reshape(-1)))
+
+    def build_corridor_graph(self):
+
+        """
+        Questo metodo contrae i corridoi del labirinto in un grafo sparso pesato.
+        I nodi del grafo sono le caselle percorribili che non hanno esattamente due
+        adiacenti percorribili (incroci, vicoli ciechi e caselle isolate), le caselle di
+        partenza e quella di arrivo; ogni tratto di corridoio che collega due nodi diventa
+        un arco, con peso pari alla somma dei pesi delle caselle in cui si entra.
+        Gli archi sono orientati, perché il peso di un tratto dipende dal verso di
+        percorrenza (si conta la casella di arrivo e non quella di partenza), e conservano
+        le caselle interne del corridoio per poter ricostruire il percorso completo.
+
+        Nei labirinti perfetti, formati quasi solo da corridoi larghi una casella, il grafo
+        ha una piccola frazione dei nodi del labirinto originale.
+
+        Returns
+        -------
+        None.
+        """
+
+        offsets, targets, weights = self.adjacency()
+        size = self.maze.size
+        index_type = self.adjacency_offsets.dtype
+
+        # Numero di caselle adiacenti percorribili di ogni casella
+        degree = np.diff(self.adjacency_offsets)
+        is_node = (self.maze.reshape(-1) != 0) & (degree != 2)
+        for pos in self.start + [self.end]:
+            is_node[self.cell_index(pos)] = True
+        # Una partenza su un muro non conta nel grado delle caselle adiacenti: queste diventano
+        # nodi, così ogni corridoio che parte da un nodo entra in una casella interna da una
+        # delle sue due adiacenti percorribili
+        height, width = self.maze.shape
+        for i, j in self.start:
+            if not self.maze[i, j]:
+                for x, y in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+                    if 0 <= x < height and 0 <= y < width and self.maze[x, y]:
+                        is_node[x * width + y] = True
+        nodes = np.flatnonzero(is_node).astype(index_type)
+        # Associa ad ogni casella l'indice del nodo corrispondente (-1 per le caselle interne ai corridoi)
+        node_of = np.full(size, -1, dtype=index_type)
+        node_of[nodes] = np.arange(len(nodes), dtype=index_type)
+        node_index = memoryview(node_of)
+
+        edge_offsets = [0]
+        edge_targets = []
+        edge_weights = []
+        # Le caselle interne di ogni arco sono cells[cell_offsets[e]:cell_offsets[e + 1]]
+        cell_offsets = [0]
+        cells = []
+        for node in nodes.tolist():
+            # Si percorre il corridoio che inizia da ciascuna casella adiacente al nodo
+            for k in range(offsets[node], offsets[node + 1]):
+                prev_pos, curr_pos = node, targets[k]
+                first = curr_pos
+                weight = 0
+                while node_index[curr_pos] == -1:
+                    weight += weights[curr_pos]
+                    cells.append(curr_pos)
+                    # Una casella interna ha esattamente due adiacenti: si prosegue in quella
+                    # da cui non si proviene
+                    next_pos = targets[offsets[curr_pos]]
+                    if next_pos == prev_pos:
+                        next_pos = targets[offsets[curr_pos] + 1]
+                    prev_pos, curr_pos = curr_pos, next_pos
+                    # Un anello di caselle interne senza nodi riporta alla prima casella: lo si scarta
+                    if curr_pos == first:
+                        break
+                # Un corridoio che torna al nodo da cui è partito non accorcia alcun percorso
+                if curr_pos == node or node_index[curr_pos] == -1:
+                    del cells[cell_offsets[-1]:]
+                    continue
+                edge_targets.append(node_index[curr_pos])
+                edge_weights.append(weight + weights[curr_pos])
+                cell_offsets.append(len(cells))
+            edge_offsets.append(len(edge_targets))
+
+        self.corridor_graph = {
+            "nodes": nodes,
+            "node_of": node_of,
+            "offsets": np.array(edge_offsets, dtype=np.int64),
+            "targets": np.array(edge_targets, dtype=index_type),
+            "weights": np.array(edge_weights, dtype=np.int64),
+            "cell_offsets": np.array(cell_offsets, dtype=np.int64),
+            "cells": np.array(cells, dtype=index_type),
+        }
+
+    def corridors(self):
+
+        """
+        Questo metodo restituisce il grafo dei corridoi contratti, costruendolo alla
+        prima chiamata, con gli array convertiti in memoryview come in adjacency.
+
+        Returns
+        -------
+        graph : dict
+            Dizionario con le chiavi:
+
+                - "nodes": indice piatto della casella di ogni nodo
+
+                - "node_of": indice del nodo di ogni casella (-1 per le caselle interne ai corridoi)
+
+                - "offsets", "targets", "weights": archi uscenti di ogni nodo in formato CSR,
+                  con il nodo di destinazione e il peso di ciascuno
+
+                - "cell_offsets", "cells": caselle interne di ogni arco, nel verso di percorrenza
+        """
+
+        if self.corridor_graph is None:
+            self.build_corridor_graph()
+        return {name: memoryview(array) for name, array in self.corridor_graph.items()}
+
+    def build_components(self):
+
+        """
+        Questo metodo etichetta le componenti connesse delle caselle percorribili con
+        operazioni vettoriali, senza visitare il labirinto casella per casella.
+        Le caselle percorribili consecutive di ogni riga formano un tratto, che riceve un
+        indice progressivo; i tratti di righe successive che si toccano vengono poi uniti
+        con una union-find vettoriale: ad ogni passo ogni coppia di tratti adiacenti con
+        rappresentanti diversi collega il rappresentante maggiore al minore, quindi i
+        puntatori vengono compressi finché ogni tratto punta direttamente al proprio
+        rappresentante. Le coppie già unite vengono scartate ad ogni passo.
+
+        Returns
+        -------
+        None.
+        """
+
+        height, width = self.maze.shape
+        passable = self.maze != 0
+        # Un tratto inizia in ogni casella percorribile la cui casella a sinistra è un muro
+        run_start = passable.copy()
+        run_start[:, 1:] &= ~passable[:, :-1]
+        index_type = np.int32 if self.maze.size < 2 ** 31 else np.int64
+        run = (np.cumsum(run_start.reshape(-1), dtype=index_type) - 1).reshape(height, width)
+        runs = int(run[-1, -1]) + 1 if self.maze.size else 0
+        if runs == 0:
+            # Labirinto senza caselle percorribili
+            self.component_labels = np.full((height, width), -1, dtype=index_type)
+            return
+
+        # Coppie di tratti collegati da due caselle percorribili una sopra l'altra
+        vertical = passable[:-1] & passable[1:]
+        upper = run[:-1][vertical]
+        lower = run[1:][vertical]
+
+        parent = np.arange(runs, dtype=index_type)
+        while True:
+            upper_root, lower_root = parent[upper], parent[lower]
+            pending = upper_root != lower_root
+            if not pending.any():
+                break
+            upper, lower = upper[pending], lower[pending]
+            upper_root, lower_root = upper_root[pending], lower_root[pending]
+            np.minimum.at(parent, np.maximum(upper_root, lower_root), np.minimum(upper_root, lower_root))
+            # Compressione dei percorsi: ogni tratto punta direttamente al proprio rappresentante
+            while True:
+                grandparent = parent[parent]
+                if np.array_equal(grandparent, parent):
+                    break
+                parent = grandparent
+
+        # I rappresentanti sono i tratti che puntano a sé stessi: le etichette vengono rinumerate
+        # da 0 nell'ordine in cui le componenti compaiono scorrendo il labirinto per righe
+        roots = parent == np.arange(runs, dtype=index_type)
+        component = (np.cumsum(roots, dtype=index_type) - 1)[parent]
+        self.component_labels = np.where(passable, component[run], -1).astype(index_type)
+
+    def components(self):
+
+        """
+        Restituisce la matrice delle etichette delle componenti connesse (vedi
+        build_components), calcolandola alla prima chiamata: due caselle percorribili
+        hanno la stessa etichetta se e solo se esiste un cammino che le collega,
+        mentre i muri hanno etichetta -1.
+        """
+
+        if self.component_labels is None:
+            self.build_components()
+        return self.component_labels
+
+    def reachable(self, pos):
+
+        """
+        Questo metodo verifica in tempo costante, tramite le etichette delle componenti
+        connesse, se dalla casella pos è possibile raggiungere la casella di arrivo.
+        Una casella di partenza che coincide con un muro può comunque spostarsi nelle
+        caselle adiacenti, per cui in quel caso si considerano le loro componenti.
+
+        Parameters
+        ----------
+        pos : tuple
+            Casella di partenza
+
+        Returns
+        -------
+        reachable : bool
+            True se esiste un percorso da pos all'arrivo.
+        """
+
+        if tuple(pos) == tuple(self.end):
+            return True
+        labels = self.components()
+        target = labels[self.end[0], self.end[1]]
+        # Nell'arrivo si può entrare solo se è percorribile
+        if target < 0:
+            return False
+        i, j = pos
+        if labels[i, j] >= 0:
+            return labels[i, j] == target
+        height, width = labels.shape
+        return any(0 <= x < height and 0 <= y < width and labels[x, y] == target
+                   for x, y in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)))
+
+    def reachability_report(self):
+
+        """
+        Restituisce un riepilogo della connettività del labirinto, utile per
+        verificare i file di input prima di risolverli.
+
+        Returns
+        -------
+        report : dict
+            Dizionario con il numero di componenti connesse ("components"), il numero di
+            caselle della componente dell'arrivo ("end_component_cells") e le caselle di
+            partenza da cui l'arrivo non è raggiungibile ("unreachable_starts").
+        """
+
+        labels = self.components()
+        target = labels[self.end[0], self.end[1]]
+        return {
+            "components": int(labels.max()) + 1 if labels.size else 0,
+            "end_component_cells": int(np.count_nonzero(labels == target)) if target >= 0 else 0,
+            "unreachable_starts": [tuple(int(c) for c in pos) for pos in self.start if not self.reachable(pos)],
+        }
+
+    def cell_index(self, pos):
+
+        """
+        Restituisce l'indice piatto della casella pos = (i, j).
+        """
+
+        return pos[0] * self.maze.shape[1] + pos[1]
+
+    def cell_position(self, index):
+
+        """
+        Restituisce la casella (i, j) corrispondente all'indice piatto index.
+        """
+
+        return divmod(index, self.maze.shape[1])
+
+    def set_cost(self, pos, weight):
+
+        """
+        Questo metodo modifica il peso di una casella del labirinto: 0 la trasforma in
+        un muro, 1 in una casella bianca e un valore da 2 a 16 in una casella grigia.
+        Le strutture derivate dalla matrice vengono aggiornate: la tabella delle adiacenze
+        verrà ricalcolata al prossimo utilizzo e il pixel dell'immagine viene ricolorato.
+
+        Parameters
+        ----------
+        pos : tuple
+            Casella da modificare
+
+        weight : int
+            Nuovo peso della casella, da 0 (muro) a 16
+
+        Returns
+        -------
+        None.
+        """
+
+        i, j = pos = (int(pos[0]), int(pos[1]))
+        height, width = self.maze.shape
+        if not (0 <= i < height and 0 <= j < width):
+            raise ValueError("La casella indicata non appartiene al labirinto")
+        if not 0 <= weight <= 16:
+            raise ValueError("Il peso di una casella deve essere compreso tra 0 e 16")
+        if weight == 0 and (pos == self.end or pos in self.start):
+            raise ValueError("Le caselle di partenza e di arrivo non possono diventare muri")
+
+        # Una matrice mappata in sola lettura da un file binario viene copiata alla prima modifica
+        if not self.maze.flags.writeable:
+            self.maze = np.array(self.maze)
+        self.maze[i, j] = weight
+        # La tabella delle adiacenze e il grafo dei corridoi non sono più validi
+        self.adjacency_offsets = None
+        self.adjacency_targets = None
+        self.corridor_graph = None
+        self.component_labels = None
+
+        # Le caselle di partenza e arrivo mantengono il loro colore; se l'immagine non è
+        # ancora stata generata lo sarà direttamente dalla matrice aggiornata
+        if self._image is not None and pos != self.end and pos not in self.start:
+            if self.image.mode != "RGB":
+                self.image = self.image.convert("RGB")
+            self.image.putpixel((j, i), tuple(int(c) for c in WEIGHT_COLORS[weight]))
+
+    def set_wall(self, pos):
+
+        """
+        Trasforma la casella pos in un muro.
+        """
+
+        self.set_cost(pos, 0)
+
+    def clear_wall(self, pos, weight=1):
+
+        """
+        Rende percorribile la casella pos, assegnandole il peso weight (di default 1).
+        """
+
+        if weight == 0:
+            raise ValueError("Una casella percorribile deve avere peso almeno pari a 1")
+        self.set_cost(pos, weight)
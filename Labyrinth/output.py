@@ -1,9 +1,18 @@
-import copy
 import json
 import os
-import imageio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+import numpy as np
 
-def output_generation(filepath, paths, peso, maze):
+# Colori dei percorsi, assegnati ciclicamente alle caselle di partenza
+COLORS = [(0, 255, 255), (255, 0, 255), (0, 128, 0), (128, 0, 128), (255, 255, 0), (192, 192, 192)]
+
+# Immagine del labirinto condivisa dai processi del pool di disegno (vedi init_render_worker)
+worker_image = None
+
+
+def output_generation(filepath, paths, peso, maze, output_dir="Percorsi", profiler=None, max_frames=None, scale=1,
+                      workers=None, pool="thread", combined=False, draw=True):
     
     """
     Questa funzione genera gli output da dare in uscita in seguito all'elaborazione.
@@ -24,6 +33,36 @@ def output_generation(filepath, paths, peso, maze):
 
     maze : Maze
         Contiene il labirinto risolto
+
+    output_dir : str
+        Directory in cui salvare i file di output
+
+    profiler : Profiler
+        Se presente, misura i tempi di disegno e salvataggio e scrive nel file JSON,
+        accanto alle informazioni di ogni partenza, le misure raccolte
+
+    max_frames : int
+        Numero massimo di frame di ogni Gif (opzionale, vedi draw_path)
+
+    scale : int
+        Fattore di ingrandimento delle immagini e delle Gif (di default 1)
+
+    workers : int
+        Numero di percorsi da disegnare contemporaneamente: con un valore maggiore di 1
+        le immagini delle diverse partenze vengono generate in un pool. I nomi dei file e
+        l'ordine delle partenze nel file JSON non dipendono dall'ordine di completamento
+
+    pool : str
+        Tipo di pool da utilizzare con workers: "thread" (i thread condividono l'immagine
+        del labirinto) oppure "process" (l'immagine viene inviata una sola volta a ogni processo)
+
+    combined : bool
+        Se True, invece di un'immagine e una Gif per ogni partenza si genera un'unica
+        immagine con tutti i percorsi, ognuno nel proprio colore
+
+    draw : bool
+        Se False si salva solo il file JSON dei percorsi, senza generare immagini e Gif
+        (e senza importare Pillow e imageio)
         
     Returns
     -------
@@ -33,8 +72,12 @@ def output_generation(filepath, paths, peso, maze):
     
     # Si scompone filepath in nome del file ed estensione
     filename, file_ext = os.path.splitext(os.path.basename(filepath))
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
 
     json_data = []
+    # Percorsi da disegnare, con l'indice della rispettiva partenza
+    drawable = []
     # Genera e riempie un dizionario path_info che conterrà le informazioni salvate nel json in uscita
     for path, i in zip(paths, range(len(maze.start))):
         path_info = {
@@ -42,20 +85,36 @@ def output_generation(filepath, paths, peso, maze):
             "end": maze.end,
         }
         if path is not None:
-            draw_path(filename, file_ext, maze, path, i)
+            drawable.append((path, i))
             path_info["length"] = len(path)
             path_info["weight"] = peso[i]
         else:
             no_path = "Nessun percorso possibile dalla posizione di partenza selezionata"
             path_info["length"] = no_path
+        # Se richiesto si aggiungono le statistiche della ricerca che ha calcolato il percorso
+        if profiler is not None and i < len(profiler.search):
+            path_info["stats"] = profiler.search[i]
         json_data.append(path_info)
 
+    # In modalità solo calcolo (draw=False) si salva soltanto il file JSON
+    if draw and combined:
+        draw_combined(filename, file_ext, maze, drawable, output_dir, profiler, scale)
+    elif draw and workers is not None and workers > 1:
+        draw_paths_parallel(filename, file_ext, maze, drawable, output_dir, profiler, max_frames, scale, workers, pool)
+    elif draw:
+        for path, i in drawable:
+            draw_path(filename, file_ext, maze, path, i, output_dir, profiler, max_frames, scale)
+
+    # Con il profiler il file contiene, accanto alla lista delle partenze, le misure raccolte
+    if profiler is not None:
+        json_data = {"paths": json_data, "profile": profiler.as_dict()}
+
     # salva le informazioni del percorso in un file JSON
-    with open(f'./Percorsi/{filename}_paths_info.json', "w") as f:
+    with open(os.path.join(output_dir, f'{filename}_paths_info.json'), "w") as f:
         json.dump(json_data, f, indent=4)
 
 
-def draw_path(filename, file_ext, maze, path, index):
+def draw_path(filename, file_ext, maze, path, index, output_dir="Percorsi", profiler=None, max_frames=None, scale=1):
     
     """
     Questa funzione colora sull'immagine del labirinto di partenza i percorsi possibili, colorandoli
@@ -63,6 +122,8 @@ def draw_path(filename, file_ext, maze, path, index):
     diverse per ogni percorso.
     
     Inoltre, genera una Gif che mostra frame per frame l'evoluzione dell'intero percorso.
+    I frame vengono scritti uno alla volta nel file, senza conservarli in memoria, per cui
+    la memoria occupata non dipende dalla lunghezza del percorso.
 
     Parameters
     ----------
@@ -80,36 +141,274 @@ def draw_path(filename, file_ext, maze, path, index):
 
     index : int
         Un intero che identifica la casella di partenza a cui fa riferimento il percorso.
+
+    output_dir : str
+        Directory in cui salvare i file di output
+
+    profiler : Profiler
+        Se presente, misura separatamente i tempi di disegno e di salvataggio delle immagini
+
+    max_frames : int
+        Numero massimo di frame della Gif: se il percorso è più lungo, ogni frame colora
+        più caselle. Di default si genera un frame per ogni casella del percorso
+
+    scale : int
+        Fattore di ingrandimento intero dell'immagine e della Gif, utile per rendere
+        visibili i labirinti piccoli (di default 1, nessun ingrandimento)
         
     Returns
     -------
     None.
     """
 
-    # Si creano due copie di image in modo da avere un'immagine su cui colorare il percorso completo
-    # e una su cui colorare frame per frame.
-    # Si usa la libreria deepcopy poiché senza genereremmo solo un riferimento a image non una nuova immagine
-    full_path_image = copy.deepcopy(maze.image)
-    frame = copy.deepcopy(maze.image)
-    # Inizializzo una lista frames in cui si salveranno mano a mano le immagini parziali
-    frames = []
-    colors = [(0, 255, 255), (255, 0, 255), (0, 128, 0), (128, 0, 128), (255, 255, 0), (192, 192, 192)]
-    # Apre l'immagine del labirinto e disegna il percorso
-    pixels = full_path_image.load()
-    pixels_f = frame.load()
-    for x, y in path[1:(len(path) - 1)]:
-        pixels[y, x] = colors[index]  # Il colore del percorso in tal modo varia a seconda della posizione di partenza
-        pixels_f[y, x] = colors[index] 
-        # All'aggiunta di ogni casella del percorso colorata salviamo quest'immagine parziale nella lista frames
-        frames.append(copy.deepcopy(frame))
-
-        # Salva il labirinto risolto
-    if file_ext != '.json':
-        ext = file_ext
-    else:
-        ext = '.tiff'  # si imposta di default il formato ".tiff" nel caso si abbia un file json in ingresso
-
-    if not os.path.exists('Percorsi'):
-        os.makedirs('Percorsi')
-    full_path_image.save(f'./Percorsi/{filename}_path_{index + 1}{ext}', format='PNG')
-    imageio.mimsave(f'./Percorsi/{filename}_path_{index+1}.gif', frames, fps=15)
+    render_path(filename, file_ext, maze.image, path, index, output_dir, profiler, max_frames, scale)
+
+
+def render_path(filename, file_ext, image, path, index, output_dir="Percorsi", profiler=None, max_frames=None, scale=1):
+
+    """
+    Questa funzione svolge il lavoro di draw_path a partire dalla sola immagine del
+    labirinto, che non viene modificata: può quindi essere eseguita contemporaneamente
+    da più thread o processi sulla stessa immagine.
+    """
+
+    # Senza profiler le fasi non vengono misurate
+    stage = profiler.stage if profiler is not None else (lambda name: nullcontext())
+    # Il colore del percorso varia a seconda della posizione di partenza
+    color = COLORS[index % len(COLORS)]
+    # Caselle da colorare, escluse partenza e arrivo
+    cells = path[1:(len(path) - 1)]
+
+    # Si colora il percorso completo su una copia dell'immagine del labirinto
+    with stage("draw"):
+        full_path_image = image.copy()
+        pixels = full_path_image.load()
+        for x, y in cells:
+            pixels[y, x] = color
+        if scale > 1:
+            from PIL import Image
+            full_path_image = full_path_image.resize((full_path_image.width * scale, full_path_image.height * scale),
+                                                     Image.NEAREST)
+
+    # Salva il labirinto risolto
+    ext = output_extension(file_ext)
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+    with stage("write_image"):
+        full_path_image.save(os.path.join(output_dir, f'{filename}_path_{index + 1}{ext}'), format='PNG')
+    with stage("write_gif"):
+        write_gif(os.path.join(output_dir, f'{filename}_path_{index + 1}.gif'), image, cells, color, max_frames, scale)
+
+
+def output_extension(file_ext):
+
+    """
+    Restituisce l'estensione delle immagini di output: quella del file di input per le
+    immagini, ".tiff" per i file json o binari.
+    """
+
+    if file_ext not in ('.json', '.maze'):
+        return file_ext
+    return '.tiff'
+
+
+def init_render_worker(image):
+
+    """
+    Inizializza un processo del pool di disegno salvando l'immagine del labirinto,
+    in modo da inviarla una sola volta invece che con ogni percorso.
+    """
+
+    global worker_image
+    worker_image = image
+
+
+def render_path_worker(filename, file_ext, path, index, output_dir, max_frames, scale):
+
+    """
+    Disegna un percorso in un processo del pool sull'immagine salvata da init_render_worker.
+    """
+
+    render_path(filename, file_ext, worker_image, path, index, output_dir, None, max_frames, scale)
+
+
+def draw_paths_parallel(filename, file_ext, maze, drawable, output_dir, profiler, max_frames, scale, workers, pool):
+
+    """
+    Questa funzione disegna i percorsi delle diverse partenze contemporaneamente in un
+    pool di thread o di processi. Ogni percorso scrive file con un nome proprio, per cui
+    il risultato non dipende dall'ordine in cui i lavori vengono completati; gli errori
+    vengono propagati nell'ordine delle partenze.
+    Con il profiler si misura il tempo complessivo del disegno (fase "render"), perché le
+    singole fasi dei diversi percorsi si sovrappongono.
+
+    Parameters
+    ----------
+    filename : str
+        Stringa contenente il nome del file di input
+
+    file_ext : str
+        Stringa contenente l'estensione del file di input
+
+    maze : Maze
+        Contiene il labirinto da disegnare
+
+    drawable : list
+        Coppie (percorso, indice della partenza) da disegnare
+
+    output_dir : str
+        Directory in cui salvare i file di output
+
+    profiler : Profiler
+        Se presente, misura il tempo complessivo del disegno
+
+    max_frames : int
+        Numero massimo di frame di ogni Gif (opzionale)
+
+    scale : int
+        Fattore di ingrandimento delle immagini e delle Gif
+
+    workers : int
+        Numero di thread o processi del pool
+
+    pool : str
+        "thread" oppure "process"
+
+    Returns
+    -------
+    None.
+    """
+
+    stage = profiler.stage if profiler is not None else (lambda name: nullcontext())
+    with stage("render"):
+        if pool == "thread":
+            # I thread condividono l'immagine del labirinto, che viene solo letta
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(render_path, filename, file_ext, maze.image, path, i, output_dir,
+                                           None, max_frames, scale) for path, i in drawable]
+                for future in futures:
+                    future.result()
+        elif pool == "process":
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker,
+                                     initargs=(maze.image,)) as executor:
+                futures = [executor.submit(render_path_worker, filename, file_ext, path, i, output_dir,
+                                           max_frames, scale) for path, i in drawable]
+                for future in futures:
+                    future.result()
+        else:
+            raise ValueError("Tipo di pool non supportato")
+
+
+def draw_combined(filename, file_ext, maze, drawable, output_dir="Percorsi", profiler=None, scale=1):
+
+    """
+    Questa funzione colora su un'unica copia dell'immagine del labirinto i percorsi di
+    tutte le partenze, ognuno nel proprio colore, e la salva come
+    {filename}_paths{ext}. Dove i percorsi si sovrappongono prevale quello della
+    partenza con indice maggiore.
+
+    Parameters
+    ----------
+    filename : str
+        Stringa contenente il nome del file di input
+
+    file_ext : str
+        Stringa contenente l'estensione del file di input
+
+    maze : Maze
+        Contiene il labirinto da disegnare
+
+    drawable : list
+        Coppie (percorso, indice della partenza) da disegnare
+
+    output_dir : str
+        Directory in cui salvare i file di output
+
+    profiler : Profiler
+        Se presente, misura i tempi di disegno e di salvataggio
+
+    scale : int
+        Fattore di ingrandimento dell'immagine
+
+    Returns
+    -------
+    None.
+    """
+
+    stage = profiler.stage if profiler is not None else (lambda name: nullcontext())
+    with stage("draw"):
+        combined_image = maze.image.copy()
+        pixels = combined_image.load()
+        for path, index in drawable:
+            color = COLORS[index % len(COLORS)]
+            for x, y in path[1:(len(path) - 1)]:
+                pixels[y, x] = color
+        if scale > 1:
+            from PIL import Image
+            combined_image = combined_image.resize((combined_image.width * scale, combined_image.height * scale),
+                                                   Image.NEAREST)
+    with stage("write_image"):
+        combined_image.save(os.path.join(output_dir, f'{filename}_paths{output_extension(file_ext)}'), format='PNG')
+
+
+def write_gif(gif_path, image, cells, color, max_frames=None, scale=1):
+
+    """
+    Questa funzione genera la Gif del percorso scrivendo i frame uno alla volta con
+    imageio.get_writer.
+    Il frame corrente è un'immagine a palette (un byte per pixel): si colorano le caselle
+    del percorso assegnando loro l'indice del colore del percorso e solo al momento della
+    scrittura lo si converte in RGB tramite la palette.
+
+    Parameters
+    ----------
+    gif_path : str
+        Path del file Gif da creare
+
+    image : PIL.Image
+        Immagine del labirinto da disegnare
+
+    cells : list
+        Caselle del percorso da colorare, in ordine
+
+    color : tuple
+        Colore RGB del percorso
+
+    max_frames : int
+        Numero massimo di frame della Gif (opzionale)
+
+    scale : int
+        Fattore di ingrandimento intero della Gif
+
+    Returns
+    -------
+    None.
+    """
+
+    # imageio viene importato solo quando si genera una Gif
+    import imageio
+
+    # Si converte l'immagine del labirinto in un'immagine a palette con al più 255 colori,
+    # riservando l'ultimo indice al colore del percorso
+    paletted = image.convert("RGB").quantize(colors=255)
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    colors = np.array(paletted.getpalette()[:255 * 3], dtype=np.uint8).reshape(-1, 3)
+    palette[:len(colors)] = colors
+    palette[255] = color
+    frame = np.array(paletted, dtype=np.uint8)
+    if scale > 1:
+        frame = frame.repeat(scale, axis=0).repeat(scale, axis=1)
+
+    # Numero di caselle colorate in ogni frame
+    step = 1
+    if max_frames is not None and len(cells) > max_frames:
+        step = -(-len(cells) // max_frames)
+
+    with imageio.get_writer(gif_path, mode="I", fps=15) as writer:
+        for k in range(0, len(cells), step):
+            for x, y in cells[k:k + step]:
+                frame[x * scale:(x + 1) * scale, y * scale:(y + 1) * scale] = 255
+            writer.append_data(palette[frame])
+        # Un percorso senza caselle intermedie produce una Gif con il solo labirinto
+        if not cells:
+            writer.append_data(palette[frame])
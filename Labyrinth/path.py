@@ -1,8 +1,21 @@
 import heapq
+from array import array
+from bisect import bisect_right
+
+import numpy as np
+
+# Peso provvisorio delle caselle non ancora raggiunte
+INFINITY = float("inf")
+
+# Numero di caselle sotto il quale la ricerca bfs espande la frontiera in Python invece che con NumPy
+SMALL_FRONTIER = 64
 
 
 class Path:
-    def __init__(self, maze):
+    # Senza il dizionario degli attributi ogni istanza occupa meno memoria
+    __slots__ = ("paths", "weight", "expanded", "stats", "distance", "compact", "buffers")
+
+    def __init__(self, maze, solver="auto", cache=None, profiler=None, starts=None, compact=False):
         
         """
         Costruttore della classe Path
@@ -11,6 +24,51 @@ class Path:
         maze : Maze
             Contiene il labirinto da risolvere
 
+        solver : str
+            Algoritmo da utilizzare per la ricerca dei percorsi:
+
+                - "dijkstra": una ricerca di Dijkstra per ogni casella di partenza
+
+                - "astar": una ricerca A* per ogni casella di partenza, guidata dalla
+                  distanza di Manhattan dalla casella di arrivo
+
+                - "dial": una ricerca di Dijkstra per ogni casella di partenza che utilizza
+                  una coda a bucket al posto dell'heap (algoritmo di Dial)
+
+                - "reverse": un'unica ricerca di Dijkstra a partire dalla casella di
+                  arrivo, da cui si ricavano i percorsi di tutte le caselle di partenza
+
+                - "corridor": una ricerca di Dijkstra per ogni casella di partenza sul grafo
+                  in cui Maze contrae i corridoi larghi una casella in singoli archi pesati
+
+                - "bfs": un'unica ricerca in ampiezza a partire dalla casella di arrivo, che
+                  espande l'intera frontiera ad ogni passo con operazioni vettoriali; è valida
+                  solo per labirinti senza caselle grigie (tutti i pesi pari a 1)
+
+                - "auto" (default): "bfs" se tutte le caselle percorribili hanno peso 1,
+                  altrimenti "dijkstra"
+
+        cache : MazeCache
+            Cache su disco dei labirinti risolti (opzionale): se il labirinto è già presente
+            la ricerca viene saltata, altrimenti i percorsi trovati vengono salvati
+
+        profiler : Profiler
+            Se presente, misura il tempo della ricerca e riceve le statistiche di ogni partenza
+
+        starts : list
+            Caselle di partenza da risolvere al posto di quelle del labirinto (opzionale), in
+            modo da interrogare più volte lo stesso labirinto già caricato; le voci della
+            cache si riferiscono alle partenze del labirinto, per cui in questo caso non viene usata
+
+        compact : bool
+            Se True la ricerca usa la modalità compatta, pensata per labirinti molto grandi:
+            lo stato della ricerca di Dijkstra è in array tipizzati indicizzati per indice
+            piatto (8 byte per il peso e 4 per il predecessore di ogni casella) e le caselle
+            adiacenti si ricavano direttamente dalla matrice, senza la tabella delle adiacenze
+            di Maze né le etichette delle componenti connesse; con "bfs" non viene conservato
+            il campo delle distanze. Sono supportati
+            gli algoritmi "auto", "dijkstra" e "bfs"
+
         Returns
         -------
         None.
@@ -18,11 +76,108 @@ class Path:
         
         self.paths = []
         self.weight = []
-        # Per ogni casella di partenza, calcola il percorso a peso minimo
-        for i in range(len(maze.start)):
-            path, weight = self.find_shortest_path_by_weight(maze.start[i],maze)
-            self.paths.append(path)
-            self.weight.append(weight)
+        # expanded conta i nodi estratti ed esplorati dalla coda durante le ricerche,
+        # in modo da poter confrontare il lavoro svolto dai diversi algoritmi
+        self.expanded = 0
+        # stats contiene, per ogni casella di partenza, le statistiche della ricerca che ne ha
+        # calcolato il percorso: nodi esplorati, inserimenti nella coda e picco della coda
+        self.stats = []
+        # distance contiene, solo per l'algoritmo "reverse", il campo delle distanze dall'arrivo
+        # indicizzato per indice piatto (infinito per le caselle non raggiunte)
+        self.distance = None
+        self.compact = compact
+        # buffers contiene le liste dei pesi minimi e dei predecessori usate dalle ricerche
+        # per ogni casella di partenza, allocate una sola volta (vedi search_arrays)
+        self.buffers = None
+
+        if starts is None:
+            starts = maze.start
+        else:
+            starts = [tuple(int(c) for c in start) for start in starts]
+            height, width = maze.maze.shape
+            if any(len(start) != 2 or not (0 <= start[0] < height and 0 <= start[1] < width) for start in starts):
+                raise ValueError("Casella di partenza non valida")
+            cache = None
+        if profiler is None:
+            self.solve(maze, solver, cache, starts)
+        else:
+            with profiler.stage("solve"):
+                self.solve(maze, solver, cache, starts)
+            profiler.search = self.stats
+
+    def solve(self, maze, solver, cache, starts):
+
+        """
+        Questo metodo calcola i percorsi di tutte le caselle di partenza con l'algoritmo
+        richiesto, recuperandoli dalla cache o salvandoli in essa se presente.
+
+        Parameters
+        ----------
+        maze : Maze
+            Contiene il labirinto da risolvere
+
+        solver : str
+            Algoritmo da utilizzare per la ricerca dei percorsi
+
+        cache : MazeCache
+            Cache su disco dei labirinti risolti (opzionale)
+
+        starts : list
+            Caselle di partenza di cui calcolare il percorso
+
+        Returns
+        -------
+        None.
+        """
+
+        # Se il labirinto è già stato risolto si recuperano i risultati dalla cache
+        entry = cache.get(maze) if cache is not None else None
+        if entry is not None:
+            self.paths, self.weight, self.distance = entry["paths"], entry["weight"], entry["distance"]
+            return
+
+        # Senza caselle grigie il percorso a peso minimo è quello con meno passi
+        if solver == "auto":
+            solver = "bfs" if int(np.max(maze.maze)) <= 1 else "dijkstra"
+        if self.compact and solver not in ("dijkstra", "bfs"):
+            raise ValueError("La modalità compatta supporta solo gli algoritmi auto, dijkstra e bfs")
+
+        # Algoritmi che svolgono una ricerca separata per ogni casella di partenza
+        per_start_solvers = {
+            "dijkstra": self.find_shortest_path_compact if self.compact else self.find_shortest_path_by_weight,
+            "astar": self.find_shortest_path_astar,
+            "dial": self.find_shortest_path_dial,
+            "corridor": self.find_shortest_path_corridor,
+        }
+        if solver in per_start_solvers:
+            # Per ogni casella di partenza, calcola il percorso a peso minimo
+            for start in starts:
+                # Se la partenza non è nella stessa componente connessa dell'arrivo non esiste
+                # alcun percorso: lo si stabilisce senza esplorare la sua regione del labirinto.
+                # In modalità compatta le etichette delle componenti non vengono calcolate,
+                # perché la loro costruzione richiede più memoria della ricerca stessa
+                if not self.compact and not maze.reachable(start):
+                    self.stats.append(self.record_search(0, 0, 0))
+                    self.paths.append(None)
+                    self.weight.append(0)
+                    continue
+                path, weight = per_start_solvers[solver](start, maze)
+                self.paths.append(path)
+                self.weight.append(weight)
+        elif solver == "reverse":
+            # Con un'unica ricerca dall'arrivo si ottengono i percorsi di tutte le partenze
+            self.paths, self.weight = self.find_shortest_paths_from_end(maze, starts)
+        elif solver == "bfs":
+            if int(np.max(maze.maze)) > 1:
+                raise ValueError("L'algoritmo bfs richiede un labirinto senza caselle grigie")
+            self.paths, self.weight = self.find_shortest_paths_bfs(maze, starts)
+        # In qualsiasi altro caso, genera un errore in quanto l'algoritmo non è supportato
+        else:
+            raise ValueError("Algoritmo di ricerca non supportato")
+        self.release_arrays(maze)
+
+        if cache is not None:
+            cache.put(maze, self.paths, self.weight, self.distance)
 
     def find_shortest_path_by_weight(self, start, maze):
    
@@ -50,40 +205,812 @@ class Path:
         weight_tot : int
             Restituisce il peso totale del percorso trovato
         """
-        
-        # Creiamo una coda vuota per tener traccia dei percorsi
-        queue = []
-        # Iniziamo l'algoritmo con il primo nodo, con un peso pari a 0
-        # e inizializziamo il percorso inserendo al suo interno solo il primo nodo
-        heapq.heappush(queue, (0, start, [start]))
 
-        # Creiamo un dizionario per tenere traccia dei nodi visitati con il loro peso minimo
-        visited = {start: 0}
+        # Le ricerche lavorano sugli indici piatti delle caselle e sulla tabella delle adiacenze
+        # precalcolata da Maze, senza creare tuple o liste ad ogni nodo esplorato
+        offsets, targets, weights = maze.adjacency()
+        source = maze.cell_index(start)
+        target = maze.cell_index(maze.end)
 
-        # Creiamo una variabile per tener traccia del peso totale del percorso
-        weight_tot = 0
+        # Creiamo una coda vuota per tener traccia dei nodi da esplorare
+        queue = []
+        # Iniziamo l'algoritmo con il primo nodo, con un peso pari a 0.
+        # Nella coda si inseriscono solo peso e indice: il percorso non viene copiato
+        # ad ogni passo ma ricostruito una sola volta, quando si estrae l'arrivo
+        heapq.heappush(queue, (0, source))
+
+        # Usiamo una lista per tenere traccia del peso minimo di ogni nodo visitato
+        # e una lista che associa ad ogni nodo visitato il nodo da cui lo si è raggiunto:
+        # sono condivise tra le ricerche, per cui si annotano i nodi raggiunti (touched)
+        # in modo da riportare solo quelli ai valori iniziali al termine della ricerca
+        visited, predecessor = self.search_arrays(maze, len(weights))
+        visited[source] = 0
+        touched = [source]
+        # Contatori dei nodi estratti ed esplorati e del picco della coda
+        popped = expanded = peak_queue = 0
 
         # Fintanto che ci sono nodi nella coda
         while queue:
-            # Prendiamo l'elemento a peso minimo dalla coda e lo assegniamo alle variabili curr_weight, curr_pos e path
-            curr_weight, curr_pos, path = heapq.heappop(queue)
+            if len(queue) > peak_queue:
+                peak_queue = len(queue)
+            # Prendiamo l'elemento a peso minimo dalla coda e lo assegniamo alle variabili curr_weight e curr_pos
+            curr_weight, curr_pos = heapq.heappop(queue)
+            popped += 1
+            # Se il nodo è già stato estratto con un peso minore lo si ignora
+            if curr_weight > visited[curr_pos]:
+                continue
+            expanded += 1
             # Se il nodo corrente è quello finale
-            if curr_pos == maze.end:
-                # Assegniamo il peso totale e restituiamo il percorso ottenuto
-                weight_tot = curr_weight
-                return path, weight_tot
+            if curr_pos == target:
+                # Ogni elemento inserito nella coda è stato estratto oppure è ancora presente
+                self.stats.append(self.record_search(expanded, popped + len(queue), peak_queue))
+                # Restituiamo il percorso ricostruito e il peso totale
+                path = self.reconstruct_path(predecessor, curr_pos, maze)
+                self.reset_arrays(touched)
+                return path, curr_weight
             # Altrimenti, per ogni posizione adiacente al nodo corrente si verifica se esse siano state già visitate
-            for next_pos, weight in maze.get_adjacent_positions(curr_pos):
-                # Se la posizione adiacente non è stata visitata
-                if next_pos not in visited:
-                    # Calcoliamo il nuovo peso totale
-                    new_weight = curr_weight + weight
-                    # Aggiungiamo la posizione adiacente al dizionario dei nodi visitati
+            for k in range(offsets[curr_pos], offsets[curr_pos + 1]):
+                next_pos = targets[k]
+                # Calcoliamo il nuovo peso totale
+                new_weight = curr_weight + weights[next_pos]
+                # Se la posizione adiacente non è stata visitata o la si raggiunge con un peso minore
+                if new_weight < visited[next_pos]:
+                    if visited[next_pos] == INFINITY:
+                        touched.append(next_pos)
+                    # Aggiorniamo il peso minimo e il predecessore della posizione adiacente
+                    visited[next_pos] = new_weight
+                    predecessor[next_pos] = curr_pos
+                    # Inseriamo la posizione adiacente con il nuovo peso totale nella coda
+                    heapq.heappush(queue, (new_weight, next_pos))
+        self.stats.append(self.record_search(expanded, popped, peak_queue))
+        self.reset_arrays(touched)
+        # Se non ci sono percorsi validi, ritorna un valore nullo (None) e un peso pari a 0
+        return None, 0
+
+    def find_shortest_path_compact(self, start, maze):
+
+        """
+        Questo metodo svolge la stessa ricerca di find_shortest_path_by_weight (e restituisce
+        gli stessi percorsi) occupando meno memoria: il peso minimo e il predecessore di ogni
+        casella sono in array tipizzati preallocati invece che in liste di oggetti Python,
+        e le caselle adiacenti si ricavano dalla matrice del labirinto invece che dalla
+        tabella delle adiacenze, che non viene costruita.
+
+        Parameters
+        ----------
+
+        start: tuple
+            Contiene la posizione di partenza
+
+        maze : Maze
+            Contiene il labirinto da risolvere
+
+        Returns
+        -------
+        path : list
+           Restituisce il percorso a peso minimo trovato tra la partenza in ingresso e l'arrivo.
+
+        weight_tot : int
+            Restituisce il peso totale del percorso trovato
+        """
+
+        height, width = maze.maze.shape
+        size = height * width
+        weights = memoryview(np.ascontiguousarray(maze.maze).reshape(-1))
+        source = maze.cell_index(start)
+        target = maze.cell_index(maze.end)
+
+        queue = [(0, source)]
+        # Array tipizzati condivisi tra le ricerche (vedi search_arrays)
+        visited, predecessor = self.search_arrays(maze, size)
+        visited[source] = 0
+        touched = [source]
+        popped = expanded = peak_queue = 0
+
+        while queue:
+            if len(queue) > peak_queue:
+                peak_queue = len(queue)
+            curr_weight, curr_pos = heapq.heappop(queue)
+            popped += 1
+            if curr_weight > visited[curr_pos]:
+                continue
+            expanded += 1
+            if curr_pos == target:
+                self.stats.append(self.record_search(expanded, popped + len(queue), peak_queue))
+                path = self.reconstruct_path(predecessor, curr_pos, maze)
+                self.reset_arrays(touched)
+                return path, curr_weight
+            # Caselle adiacenti nello stesso ordine della tabella delle adiacenze
+            # (sopra, sotto, sinistra, destra), così i percorsi coincidono con quelli di Dijkstra
+            i, j = divmod(curr_pos, width)
+            for next_pos, inside in ((curr_pos - width, i > 0), (curr_pos + width, i < height - 1),
+                                     (curr_pos - 1, j > 0), (curr_pos + 1, j < width - 1)):
+                if not inside or not weights[next_pos]:
+                    continue
+                new_weight = curr_weight + weights[next_pos]
+                if new_weight < visited[next_pos]:
+                    if visited[next_pos] == INFINITY:
+                        touched.append(next_pos)
                     visited[next_pos] = new_weight
-                    # Creiamo una nuova lista del percorso con la posizione adiacente
-                    new_path = list(path)
-                    new_path.append(next_pos)
-                    # Inseriamo la posizione adiacente con il nuovo peso totale e il nuovo percorso nella coda
-                    heapq.heappush(queue, (new_weight, next_pos, new_path))
-        # Se non ci sono percorsi validi, ritorna un valore nullo (None)
-        return None, weight_tot
+                    predecessor[next_pos] = curr_pos
+                    heapq.heappush(queue, (new_weight, next_pos))
+        self.stats.append(self.record_search(expanded, popped, peak_queue))
+        self.reset_arrays(touched)
+        return None, 0
+
+    def find_shortest_path_astar(self, start, maze):
+
+        """
+        Questo metodo svolge la stessa ricerca di find_shortest_path_by_weight utilizzando
+        l'algoritmo A*: i nodi vengono estratti dalla coda in ordine di peso percorso più
+        distanza di Manhattan dalla casella di arrivo.
+        Poiché ogni casella ha peso almeno pari a 1, la distanza di Manhattan non supera mai
+        il peso effettivo del percorso rimanente (euristica ammissibile e consistente),
+        per cui il peso restituito è lo stesso di Dijkstra, esplorando però meno nodi.
+
+        Parameters
+        ----------
+
+        start: tuple
+            Contiene la posizione di partenza
+
+        maze : Maze
+            Contiene il labirinto da risolvere
+
+        Returns
+        -------
+        path : list
+           Restituisce il percorso a peso minimo trovato tra la partenza in ingresso e l'arrivo.
+
+        weight_tot : int
+            Restituisce il peso totale del percorso trovato
+        """
+
+        offsets, targets, weights = maze.adjacency()
+        width = maze.maze.shape[1]
+        source = maze.cell_index(start)
+        target = maze.cell_index(maze.end)
+        end_i, end_j = maze.end
+        # Nella coda si inseriscono la stima del peso totale, il peso percorso cambiato di segno
+        # (a parità di stima si preferiscono i nodi più vicini all'arrivo) e l'indice del nodo
+        queue = [(abs(start[0] - end_i) + abs(start[1] - end_j), 0, source)]
+        visited, predecessor = self.search_arrays(maze, len(weights))
+        visited[source] = 0
+        touched = [source]
+        popped = expanded = peak_queue = 0
+
+        while queue:
+            if len(queue) > peak_queue:
+                peak_queue = len(queue)
+            _, curr_weight, curr_pos = heapq.heappop(queue)
+            popped += 1
+            curr_weight = -curr_weight
+            # Se il nodo è già stato estratto con un peso minore lo si ignora
+            if curr_weight > visited[curr_pos]:
+                continue
+            expanded += 1
+            # Se il nodo corrente è quello finale restituiamo il percorso e il peso totale
+            if curr_pos == target:
+                self.stats.append(self.record_search(expanded, popped + len(queue), peak_queue))
+                path = self.reconstruct_path(predecessor, curr_pos, maze)
+                self.reset_arrays(touched)
+                return path, curr_weight
+            for k in range(offsets[curr_pos], offsets[curr_pos + 1]):
+                next_pos = targets[k]
+                new_weight = curr_weight + weights[next_pos]
+                if new_weight < visited[next_pos]:
+                    if visited[next_pos] == INFINITY:
+                        touched.append(next_pos)
+                    visited[next_pos] = new_weight
+                    predecessor[next_pos] = curr_pos
+                    # Stima del peso totale: peso percorso più distanza di Manhattan dall'arrivo
+                    next_i, next_j = divmod(next_pos, width)
+                    estimate = new_weight + abs(next_i - end_i) + abs(next_j - end_j)
+                    heapq.heappush(queue, (estimate, -new_weight, next_pos))
+        self.stats.append(self.record_search(expanded, popped, peak_queue))
+        self.reset_arrays(touched)
+        # Se non ci sono percorsi validi, ritorna un valore nullo (None) e un peso pari a 0
+        return None, 0
+
+    def find_shortest_path_dial(self, start, maze):
+
+        """
+        Questo metodo svolge la stessa ricerca di find_shortest_path_by_weight sostituendo
+        l'heap con una coda circolare a bucket (algoritmo di Dial).
+        I pesi delle caselle sono interi piccoli (da 1 a 16), per cui tutti i pesi provvisori
+        presenti nella coda sono compresi tra il peso corrente e il peso corrente più 16:
+        bastano quindi 17 bucket, indicizzati dal peso modulo 17, e ogni inserimento ed
+        estrazione costa O(1) invece di O(log n).
+
+        Parameters
+        ----------
+
+        start: tuple
+            Contiene la posizione di partenza
+
+        maze : Maze
+            Contiene il labirinto da risolvere
+
+        Returns
+        -------
+        path : list
+           Restituisce il percorso a peso minimo trovato tra la partenza in ingresso e l'arrivo.
+
+        weight_tot : int
+            Restituisce il peso totale del percorso trovato
+        """
+
+        offsets, targets, weights = maze.adjacency()
+        source = maze.cell_index(start)
+        target = maze.cell_index(maze.end)
+
+        # Il numero di bucket è il peso massimo di una casella più 1 (17 per i labirinti validi)
+        size = int(maze.maze.max()) + 1
+        buckets = [[] for _ in range(size)]
+        buckets[0].append(source)
+        # Numero di nodi presenti nella coda, di inserimenti e picco della coda
+        pending = pushes = peak_queue = 1
+        expanded = 0
+        visited, predecessor = self.search_arrays(maze, len(weights))
+        visited[source] = 0
+        touched = [source]
+
+        curr_weight = 0
+        # Fintanto che ci sono nodi nella coda, si scorrono i bucket in ordine di peso
+        while pending:
+            # Il picco della coda viene misurato all'inizio di ogni bucket
+            if pending > peak_queue:
+                peak_queue = pending
+            bucket = buckets[curr_weight % size]
+            for curr_pos in bucket:
+                # Se il nodo è stato raggiunto in seguito con un peso minore lo si ignora
+                if visited[curr_pos] != curr_weight:
+                    continue
+                expanded += 1
+                # Se il nodo corrente è quello finale restituiamo il percorso e il peso totale
+                if curr_pos == target:
+                    self.stats.append(self.record_search(expanded, pushes, peak_queue))
+                    path = self.reconstruct_path(predecessor, curr_pos, maze)
+                    self.reset_arrays(touched)
+                    return path, curr_weight
+                for k in range(offsets[curr_pos], offsets[curr_pos + 1]):
+                    next_pos = targets[k]
+                    new_weight = curr_weight + weights[next_pos]
+                    if new_weight < visited[next_pos]:
+                        if visited[next_pos] == INFINITY:
+                            touched.append(next_pos)
+                        visited[next_pos] = new_weight
+                        predecessor[next_pos] = curr_pos
+                        # Il peso è maggiore di curr_weight di al più size - 1, per cui il
+                        # bucket di destinazione è sempre diverso da quello corrente
+                        buckets[new_weight % size].append(next_pos)
+                        pending += 1
+                        pushes += 1
+            pending -= len(bucket)
+            bucket.clear()
+            curr_weight += 1
+        self.stats.append(self.record_search(expanded, pushes, peak_queue))
+        self.reset_arrays(touched)
+        # Se non ci sono percorsi validi, ritorna un valore nullo (None) e un peso pari a 0
+        return None, 0
+
+    def find_shortest_path_corridor(self, start, maze):
+
+        """
+        Questo metodo svolge la stessa ricerca di find_shortest_path_by_weight sul grafo dei
+        corridoi contratti calcolato da Maze.corridors: i nodi sono solo incroci, vicoli
+        ciechi, partenze e arrivo, per cui nei labirinti formati da corridoi la coda
+        contiene ed estrae molti meno elementi. Gli archi del percorso trovato vengono
+        poi espansi nelle caselle dei corridoi corrispondenti.
+
+        Parameters
+        ----------
+
+        start: tuple
+            Contiene la posizione di partenza
+
+        maze : Maze
+            Contiene il labirinto da risolvere
+
+        Returns
+        -------
+        path : list
+           Restituisce il percorso a peso minimo trovato tra la partenza in ingresso e l'arrivo.
+
+        weight_tot : int
+            Restituisce il peso totale del percorso trovato
+        """
+
+        graph = maze.corridors()
+        offsets, targets, weights = graph["offsets"], graph["targets"], graph["weights"]
+        source = graph["node_of"][maze.cell_index(start)]
+        target = graph["node_of"][maze.cell_index(maze.end)]
+
+        queue = [(0, source)]
+        # Per ogni nodo si memorizza l'arco con cui lo si è raggiunto, da cui si ricavano
+        # sia il nodo precedente sia le caselle del corridoio percorso
+        visited, predecessor = self.search_arrays(maze, len(graph["nodes"]))
+        visited[source] = 0
+        touched = [source]
+        popped = expanded = peak_queue = 0
+
+        while queue:
+            if len(queue) > peak_queue:
+                peak_queue = len(queue)
+            curr_weight, curr_node = heapq.heappop(queue)
+            popped += 1
+            # Se il nodo è già stato estratto con un peso minore lo si ignora
+            if curr_weight > visited[curr_node]:
+                continue
+            expanded += 1
+            if curr_node == target:
+                self.stats.append(self.record_search(expanded, popped + len(queue), peak_queue))
+                path = self.expand_corridor_path(graph, predecessor, curr_node, maze)
+                self.reset_arrays(touched)
+                return path, curr_weight
+            for edge in range(offsets[curr_node], offsets[curr_node + 1]):
+                next_node = targets[edge]
+                new_weight = curr_weight + weights[edge]
+                if new_weight < visited[next_node]:
+                    if visited[next_node] == INFINITY:
+                        touched.append(next_node)
+                    visited[next_node] = new_weight
+                    predecessor[next_node] = edge
+                    heapq.heappush(queue, (new_weight, next_node))
+        self.stats.append(self.record_search(expanded, popped, peak_queue))
+        self.reset_arrays(touched)
+        # Se non ci sono percorsi validi, ritorna un valore nullo (None) e un peso pari a 0
+        return None, 0
+
+    def expand_corridor_path(self, graph, predecessor, end, maze):
+
+        """
+        Questo metodo ricostruisce il percorso, casella per casella, che termina nel nodo end
+        del grafo dei corridoi, risalendo gli archi con cui sono stati raggiunti i nodi.
+
+        Parameters
+        ----------
+
+        graph : dict
+            Grafo dei corridoi restituito da Maze.corridors
+
+        predecessor : list
+            Associa all'indice di ogni nodo raggiunto l'arco con cui lo si è raggiunto
+            (-1 per il nodo di partenza)
+
+        end : int
+            Contiene l'indice del nodo in cui termina il percorso
+
+        maze : Maze
+            Contiene il labirinto risolto, utilizzato per convertire gli indici in posizioni
+
+        Returns
+        -------
+        path : list
+           Restituisce il percorso dalla partenza fino alla casella del nodo end.
+        """
+
+        nodes, cell_offsets, cells = graph["nodes"], graph["cell_offsets"], graph["cells"]
+        offsets = graph["offsets"]
+        path = [maze.cell_position(nodes[end])]
+        while predecessor[end] != -1:
+            edge = predecessor[end]
+            # Le caselle interne dell'arco vengono aggiunte al contrario, come il resto del percorso
+            for k in range(cell_offsets[edge + 1] - 1, cell_offsets[edge] - 1, -1):
+                path.append(maze.cell_position(cells[k]))
+            # Il nodo da cui parte l'arco è quello il cui intervallo di archi uscenti lo contiene
+            end = bisect_right(offsets, edge) - 1
+            path.append(maze.cell_position(nodes[end]))
+        path.reverse()
+        return path
+
+    def search_arrays(self, maze, size):
+
+        """
+        Questo metodo restituisce le liste dei pesi minimi e dei predecessori (array tipizzati
+        in modalità compatta) utilizzate dalle ricerche per ogni casella di partenza.
+        Vengono allocate una sola volta e ogni ricerca riporta ai valori iniziali solo le
+        caselle che ha raggiunto (vedi reset_arrays), per cui il costo di una ricerca dipende
+        dalla parte di labirinto esplorata e non dalla dimensione del labirinto. Le liste
+        restituite a Maze da release_arrays vengono riutilizzate dalle istanze successive di
+        Path sullo stesso labirinto, ad esempio dalle richieste del servizio di risoluzione.
+
+        Parameters
+        ----------
+        maze : Maze
+            Contiene il labirinto da risolvere
+
+        size : int
+            Numero di nodi del grafo su cui si svolge la ricerca
+
+        Returns
+        -------
+        visited : list
+            Peso minimo di ogni nodo (INFINITY se non raggiunto).
+
+        predecessor : list
+            Nodo (o arco) da cui è stato raggiunto ogni nodo (-1 se non raggiunto).
+        """
+
+        if self.buffers is None or len(self.buffers[0]) != size:
+            self.buffers = None
+            if not self.compact and size == maze.maze.size:
+                # pop è atomica, per cui più thread possono prendere liste diverse dallo stesso labirinto
+                try:
+                    self.buffers = maze.search_buffers.pop()
+                except IndexError:
+                    pass
+            if self.buffers is None:
+                if self.compact:
+                    # Pesi in double (interi esatti fino a 2^53) e predecessori a 32 bit quando bastano
+                    self.buffers = (array("d", [INFINITY]) * size,
+                                    array("i" if size < 2 ** 31 else "q", [-1]) * size)
+                else:
+                    self.buffers = ([INFINITY] * size, [-1] * size)
+        return self.buffers
+
+    def reset_arrays(self, touched):
+
+        """
+        Questo metodo riporta ai valori iniziali i pesi minimi e i predecessori dei nodi
+        raggiunti da una ricerca, in modo che la ricerca successiva trovi le liste pulite.
+
+        Parameters
+        ----------
+        touched : list
+            Nodi raggiunti dalla ricerca
+
+        Returns
+        -------
+        None.
+        """
+
+        visited, predecessor = self.buffers
+        for node in touched:
+            visited[node] = INFINITY
+            predecessor[node] = -1
+
+    def release_arrays(self, maze):
+
+        """
+        Questo metodo restituisce a Maze le liste delle ricerche, già riportate ai valori
+        iniziali, perché le riutilizzino le istanze successive di Path. Si conservano solo
+        le liste indicizzate per casella: quelle del grafo dei corridoi e, in modalità
+        compatta, gli array tipizzati vengono liberati, per non occupare memoria oltre la ricerca.
+
+        Parameters
+        ----------
+        maze : Maze
+            Contiene il labirinto risolto
+
+        Returns
+        -------
+        None.
+        """
+
+        if self.buffers is not None and not self.compact and len(self.buffers[0]) == maze.maze.size:
+            maze.search_buffers.append(self.buffers)
+        self.buffers = None
+
+    def record_search(self, expanded, pushes, peak_queue):
+
+        """
+        Questo metodo registra le statistiche di una ricerca appena conclusa.
+
+        Parameters
+        ----------
+        expanded : int
+            Numero di nodi estratti dalla coda ed esplorati
+
+        pushes : int
+            Numero di inserimenti nella coda
+
+        peak_queue : int
+            Numero massimo di elementi presenti contemporaneamente nella coda
+
+        Returns
+        -------
+        stats : dict
+            Dizionario con le statistiche registrate.
+        """
+
+        self.expanded += expanded
+        stats = {"expanded": expanded, "pushes": pushes, "peak_queue": peak_queue}
+        return stats
+
+    def reconstruct_path(self, predecessor, end, maze):
+
+        """
+        Questo metodo ricostruisce il percorso che termina in end risalendo
+        i predecessori fino al nodo di partenza, che è l'unico a non averne uno.
+
+        Parameters
+        ----------
+
+        predecessor : list
+            Associa all'indice di ogni nodo visitato l'indice del nodo da cui è stato
+            raggiunto (-1 per il nodo di partenza)
+
+        end : int
+            Contiene l'indice dell'ultima posizione del percorso
+
+        maze : Maze
+            Contiene il labirinto risolto, utilizzato per convertire gli indici in posizioni
+
+        Returns
+        -------
+        path : list
+           Restituisce il percorso dalla partenza fino a end.
+        """
+
+        path = [maze.cell_position(end)]
+        while predecessor[end] != -1:
+            end = predecessor[end]
+            path.append(maze.cell_position(end))
+        # Il percorso è stato ricostruito al contrario, quindi lo si inverte
+        path.reverse()
+        return path
+
+    def find_shortest_paths_from_end(self, maze, starts=None):
+
+        """
+        Questo metodo svolge un'unica ricerca di Dijkstra partendo dalla casella di arrivo
+        e costruisce per ogni casella raggiunta la distanza dall'arrivo e la casella
+        successiva lungo il percorso a peso minimo. Da questi due campi si ricavano
+        direttamente il percorso e il peso di ogni casella di partenza.
+
+        Poiché il peso di uno spostamento è quello della casella in cui si entra, percorrendo
+        il labirinto al contrario il passaggio da una casella curr_pos a una sua adiacente
+        costa il peso di curr_pos: in questo modo la distanza di ogni partenza coincide con il
+        peso calcolato da find_shortest_path_by_weight.
+
+        Parameters
+        ----------
+
+        maze : Maze
+            Contiene il labirinto da risolvere
+
+        starts : list
+            Caselle di partenza (di default quelle del labirinto)
+
+        Returns
+        -------
+        paths : list
+           Restituisce, per ogni casella di partenza, il percorso a peso minimo verso l'arrivo
+           (None se non esiste alcun percorso).
+
+        weights : list
+            Restituisce, per ogni casella di partenza, il peso totale del percorso trovato
+            (0 se non esiste alcun percorso).
+        """
+
+        if starts is None:
+            starts = maze.start
+        offsets, targets, weights = maze.adjacency()
+        target = maze.cell_index(maze.end)
+
+        # Creiamo una coda con la sola casella di arrivo, con un peso pari a 0
+        queue = [(0, target)]
+        # distance contiene il peso minimo per raggiungere l'arrivo da ogni casella
+        distance = [INFINITY] * len(weights)
+        distance[target] = 0
+        # successor contiene, per ogni casella, la casella successiva lungo il percorso verso l'arrivo
+        successor = [-1] * len(weights)
+        # Caselle di partenza di cui non conosciamo ancora il peso minimo: quelle da cui l'arrivo
+        # non è raggiungibile vengono escluse, così la ricerca non esplora tutta la componente
+        # dell'arrivo prima di fermarsi
+        remaining = set(maze.cell_index(start) for start in starts if maze.reachable(start))
+        # Le partenze che coincidono con un muro non compaiono nella tabella delle adiacenze:
+        # le si raggiunge a parte dalle caselle adiacenti, come nodi da cui si esce ma in cui
+        # non si entra, e la loro distanza è quella della migliore casella adiacente più il suo peso
+        height, width = maze.maze.shape
+        wall_starts = set(cell for cell in remaining if not weights[cell])
+        popped = expanded = peak_queue = 0
+
+        # Fintanto che ci sono nodi nella coda e partenze da raggiungere
+        while queue and remaining:
+            if len(queue) > peak_queue:
+                peak_queue = len(queue)
+            curr_weight, curr_pos = heapq.heappop(queue)
+            popped += 1
+            # Se il nodo è già stato estratto con un peso minore lo si ignora
+            if curr_weight > distance[curr_pos]:
+                continue
+            expanded += 1
+            remaining.discard(curr_pos)
+            # Da una partenza su un muro non si prosegue, perché nei muri non si entra
+            if curr_pos in wall_starts:
+                continue
+            # Entrare in curr_pos da una casella adiacente costa il peso di curr_pos
+            new_weight = curr_weight + weights[curr_pos]
+            for k in range(offsets[curr_pos], offsets[curr_pos + 1]):
+                next_pos = targets[k]
+                # Aggiorniamo la casella adiacente solo se il nuovo peso è migliore
+                if new_weight < distance[next_pos]:
+                    distance[next_pos] = new_weight
+                    successor[next_pos] = curr_pos
+                    heapq.heappush(queue, (new_weight, next_pos))
+            if wall_starts:
+                i, j = divmod(curr_pos, width)
+                for next_pos, inside in ((curr_pos - width, i > 0), (curr_pos + width, i < height - 1),
+                                         (curr_pos - 1, j > 0), (curr_pos + 1, j < width - 1)):
+                    if inside and next_pos in wall_starts and new_weight < distance[next_pos]:
+                        distance[next_pos] = new_weight
+                        successor[next_pos] = curr_pos
+                        heapq.heappush(queue, (new_weight, next_pos))
+
+        self.distance = np.array(distance, dtype=np.float64)
+        # L'unica ricerca è condivisa da tutte le partenze, che hanno quindi le stesse statistiche
+        stats = self.record_search(expanded, popped + len(queue), peak_queue)
+        stats["shared"] = True
+        self.stats = [stats] * len(starts)
+
+        paths = []
+        weights = []
+        # Ricostruiamo il percorso di ogni partenza seguendo le caselle successive fino all'arrivo
+        for start in starts:
+            curr_pos = maze.cell_index(start)
+            if distance[curr_pos] == INFINITY:
+                # Se non ci sono percorsi validi, il percorso è nullo (None) e il peso è 0
+                paths.append(None)
+                weights.append(0)
+                continue
+            path = [start]
+            while successor[curr_pos] != -1:
+                curr_pos = successor[curr_pos]
+                path.append(maze.cell_position(curr_pos))
+            paths.append(path)
+            weights.append(distance[maze.cell_index(start)])
+        return paths, weights
+
+    def find_shortest_paths_bfs(self, maze, starts=None):
+
+        """
+        Questo metodo svolge un'unica ricerca in ampiezza (BFS) a partire dalla casella di
+        arrivo, valida quando tutte le caselle percorribili hanno peso 1: il peso di un
+        percorso è allora il numero di passi, e la distanza di ogni casella dall'arrivo è
+        il passo in cui la ricerca la raggiunge per la prima volta.
+
+        Invece di estrarre le caselle una alla volta da una coda, ad ogni passo si espande
+        l'intera frontiera con operazioni vettoriali. Quando la frontiera occupa una parte
+        consistente del rettangolo che la contiene, la si rappresenta come matrice booleana
+        limitata a quel rettangolo e la si espande con quattro scorrimenti combinati in OR
+        con sé stessa, tenendo poi (AND) solo le caselle percorribili non ancora raggiunte;
+        quando è sparsa (ad esempio nei corridoi) si espandono direttamente i suoi indici.
+        I percorsi si ricostruiscono a ritroso da ogni partenza, scendendo ad ogni passo
+        nella casella adiacente più vicina all'arrivo.
+
+        Parameters
+        ----------
+
+        maze : Maze
+            Contiene il labirinto da risolvere
+
+        starts : list
+            Caselle di partenza (di default quelle del labirinto)
+
+        Returns
+        -------
+        paths : list
+           Restituisce, per ogni casella di partenza, il percorso a peso minimo verso l'arrivo
+           (None se non esiste alcun percorso).
+
+        weights : list
+            Restituisce, per ogni casella di partenza, il peso totale del percorso trovato
+            (0 se non esiste alcun percorso).
+        """
+
+        if starts is None:
+            starts = maze.start
+        height, width = maze.maze.shape
+        target = maze.cell_index(maze.end)
+        # Se l'arrivo coincide con un muro nessuna casella lo raggiunge e l'unico percorso è
+        # quello di una partenza che coincide con l'arrivo stesso: la ricerca non parte e,
+        # lasciando l'arrivo tra le caselle non raggiunte, la ricostruzione non vi entra
+        end_open = bool(maze.maze[maze.end[0], maze.end[1]])
+        # steps contiene il passo in cui ogni casella è stata raggiunta (-1 se non raggiunta)
+        steps = np.full(height * width, -1, dtype=np.int32)
+        if end_open:
+            steps[target] = 0
+        # Caselle percorribili non ancora raggiunte, come vettore piatto e come matrice
+        unvisited = np.asarray(maze.maze).reshape(-1) != 0
+        unvisited[target] = False
+        unvisited_grid = unvisited.reshape(height, width)
+
+        # Caselle che la ricerca deve raggiungere: le partenze da cui l'arrivo è raggiungibile
+        # (tutte in modalità compatta, dove la ricerca si ferma comunque a frontiera vuota)
+        # e, per quelle che coincidono con un muro, le caselle adiacenti percorribili
+        pending = []
+        for start in starts:
+            if not self.compact and not maze.reachable(start):
+                continue
+            i, j = start
+            if maze.maze[i, j]:
+                pending.append(maze.cell_index(start))
+            else:
+                pending.extend(x * width + y for x, y in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1))
+                               if 0 <= x < height and 0 <= y < width and maze.maze[x, y])
+        # Viste memoryview per i passi svolti caselle per casella, più rapide degli array NumPy
+        steps_view = memoryview(steps)
+        unvisited_view = memoryview(unvisited)
+        pending = {cell for cell in pending if steps_view[cell] < 0}
+
+        frontier = [target] if end_open else []
+        level = expanded = peak_queue = 0
+        while len(frontier) and pending:
+            level += 1
+            expanded += len(frontier)
+            peak_queue = max(peak_queue, len(frontier))
+            if len(frontier) <= SMALL_FRONTIER:
+                # Frontiera di poche caselle (ad esempio in un corridoio): le operazioni
+                # vettoriali costerebbero più delle caselle stesse, per cui la si espande in Python
+                reached = []
+                for curr_pos in frontier:
+                    i, j = divmod(curr_pos, width)
+                    for next_pos, inside in ((curr_pos - width, i > 0), (curr_pos + width, i < height - 1),
+                                             (curr_pos - 1, j > 0), (curr_pos + 1, j < width - 1)):
+                        if inside and unvisited_view[next_pos]:
+                            unvisited_view[next_pos] = False
+                            steps_view[next_pos] = level
+                            reached.append(next_pos)
+                frontier = reached
+            else:
+                frontier = np.asarray(frontier, dtype=np.int64)
+                rows, cols = np.divmod(frontier, width)
+                # Rettangolo che contiene la frontiera, allargato di una casella per lato
+                top, bottom = max(int(rows.min()) - 1, 0), min(int(rows.max()) + 2, height)
+                left, right = max(int(cols.min()) - 1, 0), min(int(cols.max()) + 2, width)
+                if 8 * len(frontier) >= (bottom - top) * (right - left):
+                    # Frontiera densa: scorrimenti della matrice booleana nelle quattro direzioni
+                    current = np.zeros((bottom - top, right - left), dtype=bool)
+                    current[rows - top, cols - left] = True
+                    reached = np.zeros_like(current)
+                    reached[1:] |= current[:-1]
+                    reached[:-1] |= current[1:]
+                    reached[:, 1:] |= current[:, :-1]
+                    reached[:, :-1] |= current[:, 1:]
+                    reached &= unvisited_grid[top:bottom, left:right]
+                    new_rows, new_cols = np.nonzero(reached)
+                    frontier = (new_rows + top) * width + (new_cols + left)
+                else:
+                    # Frontiera sparsa: indici delle caselle adiacenti, senza uscire dal labirinto
+                    frontier = np.concatenate((frontier[rows > 0] - width, frontier[rows < height - 1] + width,
+                                               frontier[cols > 0] - 1, frontier[cols < width - 1] + 1))
+                    frontier = np.unique(frontier[unvisited[frontier]])
+                unvisited[frontier] = False
+                steps[frontier] = level
+                if len(frontier) <= SMALL_FRONTIER:
+                    frontier = frontier.tolist()
+            pending = {cell for cell in pending if steps_view[cell] < 0}
+
+        if not self.compact:
+            self.distance = np.where(steps >= 0, steps, INFINITY)
+        # L'unica ricerca è condivisa da tutte le partenze, che hanno quindi le stesse statistiche
+        stats = self.record_search(expanded, int(np.count_nonzero(steps >= 0)), peak_queue)
+        stats["shared"] = True
+        self.stats = [stats] * len(starts)
+
+        steps = steps_view
+        paths = []
+        weights = []
+        for start in starts:
+            curr_pos = maze.cell_index(start)
+            path = [tuple(start)]
+            # Si scende ogni volta nella casella adiacente raggiunta nel passo più basso
+            # (a parità, nell'ordine sopra, sotto, sinistra, destra)
+            while curr_pos != target:
+                i, j = divmod(curr_pos, width)
+                best = -1
+                for next_pos, inside in ((curr_pos - width, i > 0), (curr_pos + width, i < height - 1),
+                                         (curr_pos - 1, j > 0), (curr_pos + 1, j < width - 1)):
+                    if inside and steps[next_pos] >= 0 and (best < 0 or steps[next_pos] < steps[best]):
+                        best = next_pos
+                if best < 0:
+                    # La partenza non è stata raggiunta: il percorso è nullo (None) e il peso è 0
+                    path = None
+                    break
+                curr_pos = best
+                path.append(maze.cell_position(curr_pos))
+            paths.append(path)
+            weights.append(len(path) - 1 if path is not None else 0)
+        return paths, weights
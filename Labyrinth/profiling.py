@@ -0,0 +1,66 @@
+import time
+from contextlib import contextmanager
+
+
+class Profiler:
+    def __init__(self):
+
+        """
+        Costruttore della classe Profiler, che raccoglie in modo facoltativo i tempi
+        delle fasi dell'elaborazione (caricamento, ricerca, disegno e salvataggio
+        degli output) e le statistiche delle ricerche svolte da Path.
+        Un'istanza può essere passata a Maze, Path e output_generation: se presente,
+        le misure vengono salvate anche nel file JSON dei percorsi.
+
+        Returns
+        -------
+        None.
+        """
+
+        # stages associa al nome di ogni fase il tempo complessivo impiegato in secondi
+        self.stages = {}
+        # search contiene, per ogni casella di partenza, le statistiche della ricerca
+        # che ne ha calcolato il percorso (nodi esplorati, inserimenti in coda, picco della coda)
+        self.search = []
+
+    @contextmanager
+    def stage(self, name):
+
+        """
+        Misura il tempo del blocco with e lo somma a quello della fase name,
+        in modo che le fasi ripetute (ad esempio il disegno di ogni percorso) si accumulino.
+
+        Parameters
+        ----------
+        name : str
+            Nome della fase
+        """
+
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - begin
+
+    def as_dict(self):
+
+        """
+        Restituisce le misure raccolte come dizionario serializzabile in JSON.
+
+        Returns
+        -------
+        profile : dict
+            Dizionario con i tempi di ogni fase ("stages"), il tempo totale ("total_seconds")
+            e i totali delle statistiche di ricerca ("search"), contando una sola volta
+            le ricerche condivise da più partenze.
+        """
+
+        searches = list({id(stats): stats for stats in self.search}.values())
+        totals = {key: sum(stats[key] for stats in searches) for key in ("expanded", "pushes")}
+        totals["peak_queue"] = max((stats["peak_queue"] for stats in searches), default=0)
+        totals["searches"] = len(searches)
+        return {
+            "stages": dict(self.stages),
+            "total_seconds": sum(self.stages.values()),
+            "search": totals,
+        }
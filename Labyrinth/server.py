@@ -0,0 +1,399 @@
+"""
+Servizio locale di risoluzione dei labirinti.
+
+Un server HTTP basato su asyncio (in ascolto su una porta TCP locale o su un socket Unix)
+mantiene in memoria i labirinti già caricati, insieme alle strutture derivate usate dalle
+ricerche (tabella delle adiacenze e componenti connesse), in un registro di dimensione
+limitata. Ogni richiesta può indicare caselle di partenza diverse da quelle del file:
+il labirinto non viene ricaricato e le ricerche, che impegnano la CPU, sono svolte in un
+pool di thread o di processi, in modo che il ciclo degli eventi resti sempre reattivo.
+
+Richieste (corpo e risposte in JSON):
+    GET  /health                                          stato del servizio
+    GET  /stats                                           statistiche del registro
+    POST /load   {"maze": path}                           carica un labirinto nel registro
+    POST /solve  {"maze": path, "starts": [[i, j], ...],  percorsi dalle partenze indicate
+                  "solver": "auto"}                       (di default quelle del file)
+
+Uso: python server.py indata/*.json --port 8765 -j 4 --memory 512
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from maze import Maze
+from path import Path
+
+# Dimensione massima del corpo di una richiesta
+MAX_BODY = 16 * 1024 * 1024
+
+# Testo associato ai codici di stato utilizzati nelle risposte
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+# Registro dei labirinti del processo corrente: con il pool di thread è condiviso da tutte
+# le richieste, con il pool di processi ogni processo ha il proprio (vedi init_worker)
+registry = None
+
+
+class MazeRegistry:
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+
+        """
+        Costruttore della classe MazeRegistry, che conserva in memoria i labirinti caricati
+        e le strutture derivate calcolate per le ricerche. Superata la dimensione massima si
+        eliminano i labirinti usati meno di recente (LRU), come in MazeCache; un labirinto
+        il cui file è stato modificato viene ricaricato.
+
+        Parameters
+        ----------
+        max_bytes : int
+            Memoria massima occupata dai labirinti del registro
+
+        Returns
+        -------
+        None.
+        """
+
+        self.max_bytes = max_bytes
+        # Associa al path assoluto di ogni file la terna (firma del file, labirinto, byte occupati)
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = self.misses = self.evictions = 0
+        # Il registro può essere usato da più thread contemporaneamente
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def footprint(maze):
+
+        """
+        Restituisce una stima dei byte occupati dalla matrice del labirinto, dalle
+        strutture derivate già calcolate e dalle liste delle ricerche lasciate da Path
+        (8 byte per elemento, dato che i valori iniziali sono oggetti condivisi).
+        """
+
+        arrays = [maze.maze, maze.adjacency_offsets, maze.adjacency_targets, maze.component_labels]
+        if maze.corridor_graph is not None:
+            arrays.extend(maze.corridor_graph.values())
+        buffers = sum(8 * len(values) for pair in list(maze.search_buffers) for values in pair)
+        return sum(array.nbytes for array in arrays if isinstance(array, np.ndarray)) + buffers
+
+    def get(self, filepath):
+
+        """
+        Questo metodo restituisce il labirinto del file indicato, caricandolo e calcolandone
+        le strutture derivate solo se non è già presente nel registro.
+
+        Parameters
+        ----------
+        filepath : str
+            Path del file del labirinto
+
+        Returns
+        -------
+        maze : Maze
+            Labirinto pronto per le ricerche.
+        """
+
+        key = os.path.abspath(filepath)
+        # Dimensione e data di modifica permettono di accorgersi che il file è cambiato
+        stat = os.stat(key)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Il caricamento avviene fuori dal lock, per non bloccare le richieste sugli altri labirinti
+        maze = Maze(key)
+        maze.adjacency()
+        maze.components()
+        self.store(key, signature, maze)
+        return maze
+
+    def store(self, key, signature, maze):
+
+        """
+        Inserisce (o aggiorna) un labirinto nel registro ed elimina quelli usati meno di
+        recente finché la memoria occupata non rientra nel limite. L'ultimo labirinto
+        inserito viene sempre mantenuto, anche se da solo supera il limite.
+        """
+
+        size = self.footprint(maze)
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[2]
+            self.entries[key] = (signature, maze, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                _, (_, _, evicted) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted
+                self.evictions += 1
+
+    def refresh(self, filepath):
+
+        """
+        Aggiorna la memoria occupata da un labirinto dopo una ricerca, che può averne
+        calcolato nuove strutture derivate (ad esempio il grafo dei corridoi).
+        """
+
+        key = os.path.abspath(filepath)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and self.footprint(entry[1]) != entry[2]:
+            self.store(key, entry[0], entry[1])
+
+    def stats(self):
+
+        """
+        Restituisce le statistiche del registro: labirinti presenti, memoria occupata e
+        numero di richieste servite con e senza caricamento e di labirinti eliminati.
+        """
+
+        with self.lock:
+            return {"mazes": list(self.entries), "bytes": self.total_bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def init_worker(max_bytes, preload=()):
+
+    """
+    Inizializza il registro del processo corrente e vi carica i labirinti indicati.
+    Con il pool di processi viene eseguita all'avvio di ogni processo.
+    """
+
+    global registry
+    registry = MazeRegistry(max_bytes)
+    for filepath in preload:
+        registry.get(filepath)
+
+
+def load_request(filepath):
+
+    """
+    Carica un labirinto nel registro e ne restituisce dimensioni, partenze e arrivo.
+    """
+
+    maze = registry.get(filepath)
+    return {"shape": list(maze.maze.shape), "starts": [list(start) for start in maze.start],
+            "end": list(maze.end)}
+
+
+def solve_request(filepath, starts=None, solver="auto"):
+
+    """
+    Questa funzione, eseguita nel pool, risolve un labirinto del registro.
+
+    Parameters
+    ----------
+    filepath : str
+        Path del file del labirinto
+
+    starts : list
+        Caselle di partenza (di default quelle del file)
+
+    solver : str
+        Algoritmo di ricerca da utilizzare in Path
+
+    Returns
+    -------
+    result : dict
+        Percorsi, pesi e nodi esplorati, nello stesso formato del file JSON di output,
+        e secondi impiegati dalla ricerca.
+    """
+
+    maze = registry.get(filepath)
+    begin = time.perf_counter()
+    p = Path(maze, solver=solver, starts=starts)
+    elapsed = time.perf_counter() - begin
+    registry.refresh(filepath)
+    return {"paths": [[list(pos) for pos in path] if path is not None else None for path in p.paths],
+            "weight": [int(w) for w in p.weight], "expanded": p.expanded, "seconds": elapsed}
+
+
+def stats_request():
+
+    """
+    Restituisce le statistiche del registro del processo in cui viene eseguita.
+    """
+
+    return registry.stats()
+
+
+class SolveServer:
+    def __init__(self, executor):
+
+        """
+        Costruttore della classe SolveServer, che riceve le richieste HTTP e le inoltra
+        al pool executor senza mai bloccare il ciclo degli eventi.
+
+        Parameters
+        ----------
+        executor : Executor
+            Pool di thread o di processi in cui eseguire caricamenti e ricerche
+
+        Returns
+        -------
+        None.
+        """
+
+        self.executor = executor
+        self.requests = 0
+        self.errors = 0
+
+    async def handle_connection(self, reader, writer):
+
+        """
+        Serve le richieste di una connessione, che resta aperta (keep-alive) finché il
+        client non la chiude o non chiede di chiuderla.
+        """
+
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    await self.respond(writer, 400, {"error": "Richiesta non valida"}, close=True)
+                    break
+                method, target, _ = parts
+                # Senza una lunghezza valida non si sa dove finisce il corpo, per cui si chiude la connessione
+                length = headers.get("content-length", "") or "0"
+                if not (length.isascii() and length.isdigit()):
+                    await self.respond(writer, 400, {"error": "Content-Length non valido"}, close=True)
+                    break
+                length = int(length)
+                if length > MAX_BODY:
+                    await self.respond(writer, 413, {"error": "Corpo della richiesta troppo grande"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.dispatch(method, target, body)
+                close = headers.get("connection", "").lower() == "close"
+                await self.respond(writer, status, payload, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+
+        """
+        Esegue la richiesta e restituisce il codice di stato e il contenuto della risposta.
+        Gli errori di una richiesta (file mancante, JSON o partenze non validi) diventano
+        risposte di errore e non interrompono il servizio.
+        """
+
+        self.requests += 1
+        loop = asyncio.get_running_loop()
+        route = target.split("?", 1)[0]
+        try:
+            if route == "/health" and method == "GET":
+                return 200, {"status": "ok", "requests": self.requests, "errors": self.errors}
+            if route == "/stats" and method == "GET":
+                return 200, await loop.run_in_executor(self.executor, stats_request)
+            if route in ("/load", "/solve") and method == "POST":
+                request = json.loads(body or b"{}")
+                if not isinstance(request, dict) or not isinstance(request.get("maze"), str):
+                    raise ValueError("Il campo maze deve contenere il path del labirinto")
+                if route == "/load":
+                    return 200, await loop.run_in_executor(self.executor, load_request, request["maze"])
+                return 200, await loop.run_in_executor(self.executor, solve_request, request["maze"],
+                                                       request.get("starts"), request.get("solver", "auto"))
+            if route in ("/health", "/stats", "/load", "/solve"):
+                status, message = 405, "Metodo non consentito"
+            else:
+                status, message = 404, "Risorsa non trovata"
+        except FileNotFoundError as error:
+            status, message = 404, str(error)
+        except (ValueError, KeyError, TypeError, OSError) as error:
+            status, message = 400, f"{type(error).__name__}: {error}"
+        except Exception as error:
+            status, message = 500, f"{type(error).__name__}: {error}"
+        self.errors += 1
+        return status, {"error": message}
+
+    async def respond(self, writer, status, payload, close=False):
+
+        """
+        Invia una risposta HTTP con il contenuto payload codificato in JSON.
+        """
+
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def serve(args):
+
+    """
+    Avvia il pool e il server e resta in ascolto fino all'interruzione del processo.
+    """
+
+    max_bytes = args.memory * 1024 * 1024
+    if args.pool == "process":
+        executor = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                       initargs=(max_bytes, args.inputs))
+    else:
+        # I thread condividono il registro del processo principale
+        init_worker(max_bytes, args.inputs)
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+    server = SolveServer(executor)
+    with executor:
+        if args.unix is not None:
+            listener = await asyncio.start_unix_server(server.handle_connection, path=args.unix)
+            address = args.unix
+        else:
+            listener = await asyncio.start_server(server.handle_connection, args.host, args.port)
+            address = f"http://{args.host}:{args.port}"
+        print(f"In ascolto su {address}", flush=True)
+        async with listener:
+            await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="*", help="labirinti da caricare all'avvio")
+    parser.add_argument("--host", default="127.0.0.1", help="indirizzo su cui restare in ascolto")
+    parser.add_argument("--port", type=int, default=8765, help="porta su cui restare in ascolto")
+    parser.add_argument("--unix", default=None, help="path di un socket Unix da usare al posto della porta TCP")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="dimensione del pool (default: numero di CPU)")
+    parser.add_argument("--pool", default="thread", choices=["thread", "process"],
+                        help="tipo di pool: i processi risolvono in parallelo, ma ognuno ha il proprio registro")
+    parser.add_argument("--memory", type=int, default=512, help="memoria massima del registro in MiB")
+    args = parser.parse_args(argv)
+
+    if args.memory < 1 or (args.workers is not None and args.workers < 1):
+        parser.error("--memory e --workers devono essere interi positivi")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
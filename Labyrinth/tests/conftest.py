@@ -0,0 +1,96 @@
+"""
+Configurazione comune dei test: rende importabili i moduli del progetto e dei benchmark
+e fornisce le funzioni per costruire piccoli labirinti e risolverli con un riferimento.
+"""
+import heapq
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+sys.path.insert(0, ROOT)
+
+from generator import generate, grid_to_data, write_json  # noqa: E402
+from maze import Maze  # noqa: E402
+
+
+def reference_weights(grid, starts, end):
+
+    """
+    Ricerca di Dijkstra di riferimento, scritta come quella originale del progetto: il
+    peso di uno spostamento è quello della casella in cui si entra, una partenza su un
+    muro può spostarsi nelle caselle adiacenti e in un arrivo su un muro non si entra.
+    Restituisce, per ogni partenza, il peso minimo (None se l'arrivo non è raggiungibile).
+    """
+
+    height, width = grid.shape
+    weights = []
+    for start in starts:
+        queue = [(0, tuple(start))]
+        visited = {tuple(start): 0}
+        found = None
+        while queue:
+            curr_weight, (i, j) = heapq.heappop(queue)
+            if curr_weight > visited[(i, j)]:
+                continue
+            if (i, j) == tuple(end):
+                found = curr_weight
+                break
+            for x, y in ((i - 1, j), (i + 1, j), (i, j - 1), (i, j + 1)):
+                if 0 <= x < height and 0 <= y < width and grid[x, y]:
+                    new_weight = curr_weight + int(grid[x, y])
+                    if new_weight < visited.get((x, y), float("inf")):
+                        visited[(x, y)] = new_weight
+                        heapq.heappush(queue, (new_weight, (x, y)))
+        weights.append(found)
+    return weights
+
+
+def check_path(grid, path, start, end, weight):
+
+    """
+    Verifica che il percorso vada dalla partenza all'arrivo con passi tra caselle adiacenti,
+    entri solo in caselle percorribili e abbia il peso indicato.
+    """
+
+    assert tuple(path[0]) == tuple(start) and tuple(path[-1]) == tuple(end)
+    assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:]))
+    assert all(grid[i, j] for i, j in path[1:])
+    assert sum(int(grid[i, j]) for i, j in path[1:]) == weight
+
+
+@pytest.fixture
+def make_maze(tmp_path):
+
+    """
+    Restituisce una funzione che salva la matrice indicata in un file JSON e lo carica con Maze.
+    """
+
+    def build(grid, starts, end, name="labirinto"):
+        filepath = str(tmp_path / f"{name}.json")
+        write_json(grid_to_data(grid, starts, end), filepath)
+        return Maze(filepath)
+
+    return build
+
+
+@pytest.fixture
+def random_maze(make_maze):
+
+    """
+    Restituisce una funzione che genera con seme fissato un labirinto di benchmarks/generator.py,
+    aggiungendo una partenza su un muro, e lo carica con Maze.
+    """
+
+    def build(kind, size, starts=4, seed=0, unit=False):
+        grid, start, end = generate(kind, size, size, starts, seed)
+        if unit:
+            grid = (grid != 0).astype(grid.dtype)
+        walls = list(zip(*(grid == 0).nonzero()))
+        if walls:
+            start = start + [tuple(int(c) for c in walls[len(walls) // 2])]
+        return make_maze(grid, start, end, f"{kind}_{size}_{seed}"), grid
+
+    return build
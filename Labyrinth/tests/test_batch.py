@@ -0,0 +1,32 @@
+import json
+import os
+
+import numpy as np
+
+from batch import output_directories, run_batch
+from generator import grid_to_data, write_json
+
+
+def test_output_directories():
+    assert output_directories(["indata/a.json", "indata/b.png"], "Percorsi") == \
+        {"indata/a.json": "Percorsi", "indata/b.png": "Percorsi"}
+    assert output_directories(["x/a/lab.json", "x/b/lab.json"], "out") == \
+        {"x/a/lab.json": os.path.join("out", "a"), "x/b/lab.json": os.path.join("out", "b")}
+
+
+def test_same_name_in_different_directories(tmp_path):
+    # Due labirinti diversi con lo stesso nome: i loro output non devono sovrascriversi
+    inputs = []
+    for name, end in (("a", (0, 3)), ("b", (3, 3))):
+        os.makedirs(tmp_path / name)
+        filepath = str(tmp_path / name / "lab.json")
+        write_json(grid_to_data(np.ones((4, 4), dtype=np.uint8), [(0, 0)], end), filepath)
+        inputs.append(filepath)
+    output_dir = str(tmp_path / "out")
+    results = run_batch(inputs, output_dir, workers=1, render={"draw": False})
+    assert all(error is None for _, _, _, error in results)
+    weights = []
+    for name in ("a", "b"):
+        with open(os.path.join(output_dir, name, "lab_paths_info.json")) as f:
+            weights.append(json.load(f)[0]["weight"])
+    assert weights == [3, 6]
@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+
+from cache import MazeCache
+from path import Path
+
+
+def test_hit(random_maze, tmp_path):
+    maze, _ = random_maze("weighted", 20, seed=3)
+    cache = MazeCache(str(tmp_path / "cache"), store_distance=True)
+    p = Path(maze, solver="reverse", cache=cache)
+    entry = cache.get(maze)
+    assert entry["weight"] == [int(w) for w in p.weight]
+    assert np.array_equal(entry["distance"], p.distance)
+
+
+def test_entry_evicted_during_get(random_maze, tmp_path, monkeypatch):
+    maze, _ = random_maze("weighted", 20, seed=3)
+    cache = MazeCache(str(tmp_path / "cache"), store_distance=True)
+    Path(maze, solver="reverse", cache=cache)
+    utime = os.utime
+
+    def evict_then_touch(path, *args, **kwargs):
+        # Un altro processo elimina la voce subito dopo la lettura del file JSON
+        for name in os.listdir(cache.directory):
+            os.remove(os.path.join(cache.directory, name))
+        return utime(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "utime", evict_then_touch)
+    assert cache.get(maze) is None
+
+
+def test_entry_removed_during_evict(random_maze, tmp_path, monkeypatch):
+    maze, _ = random_maze("weighted", 20, seed=3)
+    cache = MazeCache(str(tmp_path / "cache"), store_distance=True)
+    Path(maze, solver="reverse", cache=cache)
+    listdir = os.listdir
+
+    def list_then_remove(path):
+        # Un altro processo elimina le voci subito dopo l'elenco dei file
+        names = listdir(path)
+        for name in names:
+            os.remove(os.path.join(path, name))
+        return names
+
+    monkeypatch.setattr(os, "listdir", list_then_remove)
+    cache.max_bytes = 0
+    cache.evict()
+    assert listdir(cache.directory) == []
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from conftest import check_path
+from hpa import HierarchicalPath, TileAbstraction
+from path import Path
+
+
+def crossings(path, tile_size):
+    # Numero di passi del percorso che attraversano il bordo tra due tessere
+    return sum((a[0] // tile_size, a[1] // tile_size) != (b[0] // tile_size, b[1] // tile_size)
+               for a, b in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("kind", ["perfect", "room", "weighted"])
+@pytest.mark.parametrize("seed,tile_size", [(0, 5), (1, 8), (2, 16)])
+def test_matches_path_within_bound(random_maze, kind, seed, tile_size):
+    maze, grid = random_maze(kind, 40, starts=8, seed=seed)
+    # Una casella percorribile isolata dai muri è una partenza da cui l'arrivo non è raggiungibile
+    maze.maze = np.array(maze.maze)
+    corner = (0, 0) if (0, 0) != tuple(maze.end) else (1, 1)
+    maze.maze[corner[0]:corner[0] + 2, corner[1]:corner[1] + 2] = 0
+    maze.maze[corner] = 1
+    maze.start = maze.start + [corner]
+
+    exact = Path(maze, solver="dijkstra")
+    hpa = HierarchicalPath(maze, tile_size=tile_size, workers=1)
+    max_weight = int(maze.maze.max())
+    for start, path, weight, best_path, best in zip(maze.start, hpa.paths, hpa.weight, exact.paths, exact.weight):
+        assert (path is None) == (best_path is None)
+        if path is None:
+            continue
+        check_path(maze.maze, path, start, maze.end, weight)
+        # Limite documentato in hpa.py: al più tile_size * peso massimo - 1 per bordo attraversato
+        assert best <= weight <= best + crossings(best_path, tile_size) * (tile_size * max_weight - 1)
+
+
+def test_walled_end(make_maze):
+    grid = np.ones((12, 12), dtype=np.uint8)
+    grid[6, :] = 0
+    grid[6, 9] = 1
+    maze = make_maze(grid, [(0, 0), (6, 3), (6, 1)], (6, 1))
+    hpa = HierarchicalPath(maze, TileAbstraction.build(maze, tile_size=4, workers=1))
+    assert hpa.paths == [None, None, [(6, 1)]] and hpa.weight == [0, 0, 0]
+
+
+def test_wall_start_next_tile(make_maze):
+    # La partenza sul muro ha come unica casella adiacente percorribile (0, 4), nella tessera accanto
+    grid = np.ones((8, 8), dtype=np.uint8)
+    grid[:, 2:4] = 0
+    maze = make_maze(grid, [(0, 3), (2, 3)], (7, 7))
+    hpa = HierarchicalPath(maze, TileAbstraction.build(maze, tile_size=4, workers=1))
+    exact = Path(maze, solver="dijkstra")
+    assert hpa.weight == exact.weight == [11, 9]
+    for start, path, weight in zip(maze.start, hpa.paths, hpa.weight):
+        check_path(maze.maze, path, start, maze.end, weight)
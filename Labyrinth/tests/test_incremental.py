@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from conftest import check_path, reference_weights
+from incremental import IncrementalPath
+from path import Path
+
+
+def weights_of(p):
+    # Peso di ogni partenza, None se non esiste alcun percorso
+    return [int(w) if path is not None else None for path, w in zip(p.paths, p.weight)]
+
+
+@pytest.mark.parametrize("kind", ["perfect", "room", "weighted"])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_matches_path_after_edits(random_maze, kind, seed):
+    maze, _ = random_maze(kind, 30, starts=5, seed=seed)
+    # Una casella percorribile isolata dai muri è una partenza da cui l'arrivo non è raggiungibile
+    maze.maze = np.array(maze.maze)
+    height, width = maze.maze.shape
+    corner = (0, 0) if (0, 0) != tuple(maze.end) else (height - 1, width - 1)
+    i, j = corner
+    maze.maze[max(i - 1, 0):i + 2, max(j - 1, 0):j + 2] = 0
+    maze.maze[i, j] = 1
+    maze.start = maze.start + [corner]
+
+    inc = IncrementalPath(maze)
+    assert weights_of(inc) == reference_weights(maze.maze, maze.start, maze.end)
+
+    # Modifiche casuali con seme fissato, confrontando ogni volta con una ricerca da zero
+    rng = np.random.default_rng(seed)
+    protected = set(map(tuple, maze.start)) | {tuple(maze.end)}
+    for _ in range(25):
+        pos = (int(rng.integers(height)), int(rng.integers(width)))
+        if pos in protected:
+            continue
+        action = rng.integers(3)
+        if action == 0:
+            inc.set_wall(pos)
+        elif action == 1:
+            inc.clear_wall(pos)
+        else:
+            inc.set_cost(pos, int(rng.integers(1, 17)))
+        expected = weights_of(Path(maze, solver="dijkstra"))
+        assert weights_of(inc) == expected
+        for path, start, weight in zip(inc.paths, maze.start, inc.weight):
+            if path is not None:
+                check_path(maze.maze, path, start, maze.end, weight)
+
+
+def test_walled_end(make_maze):
+    grid = np.ones((5, 5), dtype=np.uint8)
+    grid[2, :] = 0
+    grid[2, 2] = 1
+    inc = IncrementalPath(make_maze(grid, [(0, 0), (2, 1), (2, 0)], (2, 0)))
+    assert inc.paths == [None, None, [(2, 0)]] and weights_of(inc) == [None, None, 0]
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from conftest import check_path, reference_weights
+from path import Path
+
+
+def walled_end_grid():
+    # Arrivo (2, 0) su un muro della riga centrale, con un solo passaggio in (2, 2)
+    grid = np.ones((5, 5), dtype=np.uint8)
+    grid[2, :] = 0
+    grid[2, 2] = 1
+    return grid
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("solver", ["auto", "dijkstra", "bfs"])
+def test_walled_end(make_maze, solver, compact):
+    maze = make_maze(walled_end_grid(), [(0, 0), (4, 4), (2, 1), (2, 0)], (2, 0))
+    p = Path(maze, solver=solver, compact=compact)
+    # Nell'arrivo non si entra: l'unico percorso è quello della partenza che coincide con esso
+    assert p.paths == [None, None, None, [(2, 0)]]
+    assert [int(w) for w in p.weight] == [0, 0, 0, 0]
+
+
+@pytest.mark.parametrize("solver", ["dijkstra", "astar", "dial", "corridor"])
+def test_search_arrays_reused(random_maze, solver):
+    maze, grid = random_maze("weighted", 40, starts=6, seed=1)
+    expected = reference_weights(grid, maze.start, maze.end)
+    # Le istanze successive riutilizzano le liste lasciate dalle precedenti: i risultati non cambiano
+    for starts in (maze.start, maze.start[::-1], maze.start[:2]):
+        p = Path(maze, solver=solver, starts=starts)
+        assert [w if path is not None else None for path, w in zip(p.paths, p.weight)] == \
+            [expected[maze.start.index(start)] for start in starts]
+    assert len(maze.search_buffers) <= 1
+    for visited, predecessor in maze.search_buffers:
+        assert len(visited) == grid.size
+        assert all(w == float("inf") for w in visited) and all(c == -1 for c in predecessor)
+
+
+def test_reverse_wall_start(random_maze, make_maze):
+    maze, grid = random_maze("weighted", 40, starts=6, seed=2)
+    assert grid[maze.start[-1]] == 0
+    p = Path(maze, solver="reverse")
+    expected = reference_weights(grid, maze.start, maze.end)
+    assert [w if path is not None else None for path, w in zip(p.paths, p.weight)] == expected
+    for path, start, weight in zip(p.paths, maze.start, p.weight):
+        if path is not None:
+            check_path(grid, path, start, maze.end, weight)
+
+    # La ricerca si ferma appena è nota la distanza della partenza sul muro, vicina all'arrivo
+    grid = np.ones((30, 30), dtype=np.uint8)
+    grid[1, 1] = 0
+    p = Path(make_maze(grid, [(1, 1)], (0, 0), "open"), solver="reverse")
+    assert p.weight == [2] and p.stats[0]["expanded"] < 10
+
+
+@pytest.mark.parametrize("compact", [False, True])
+@pytest.mark.parametrize("kind,size", [("perfect", 41), ("room", 150), ("weighted", 150)])
+def test_bfs_matches_dijkstra(random_maze, kind, size, compact):
+    # Labirinti senza caselle grigie, abbastanza grandi da espandere la frontiera con NumPy
+    maze, _ = random_maze(kind, size, starts=6, seed=4, unit=True)
+    maze.maze = np.array(maze.maze)
+    corner = (0, 0) if (0, 0) != tuple(maze.end) else (1, 1)
+    maze.maze[corner[0]:corner[0] + 2, corner[1]:corner[1] + 2] = 0
+    maze.maze[corner] = 1
+    maze.start = maze.start + [corner]
+
+    bfs = Path(maze, compact=compact)
+    # Con tutti i pesi pari a 1 "auto" sceglie la ricerca in ampiezza, condivisa tra le partenze
+    assert all(stats.get("shared") for stats in bfs.stats)
+    expected = reference_weights(maze.maze, maze.start, maze.end)
+    assert [w if path is not None else None for path, w in zip(bfs.paths, bfs.weight)] == expected
+    assert expected[-1] is None and None not in expected[:-1]
+    for path, start, weight in zip(bfs.paths, maze.start, bfs.weight):
+        if path is not None:
+            check_path(maze.maze, path, start, maze.end, weight)
+
+
+@pytest.mark.parametrize("grid,start,end,weight", [
+    # Partenza su un muro che non conta nel grado delle caselle adiacenti
+    ([[1, 1], [1, 1], [0, 0]], (2, 1), (1, 0), 2),
+    # Partenza su un muro affacciata su un anello di caselle interne senza nodi
+    ([[1, 1, 0, 1, 1], [1, 1, 0, 1, 1]], (0, 2), (1, 0), 3),
+])
+def test_corridor_wall_start(make_maze, grid, start, end, weight):
+    p = Path(make_maze(np.array(grid, dtype=np.uint8), [start], end), solver="corridor")
+    assert p.weight == [weight]
+
+
+@pytest.mark.parametrize("kind", ["perfect", "room", "weighted"])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_corridor_matches_dijkstra(random_maze, kind, seed):
+    maze, grid = random_maze(kind, 40, starts=6, seed=seed)
+    # Altre partenze su muri, anche adiacenti all'arrivo
+    walls = list(zip(*(grid == 0).nonzero()))
+    maze.start = maze.start + [tuple(int(c) for c in walls[k]) for k in (0, len(walls) // 4, -1)]
+    corridor = Path(maze, solver="corridor")
+    expected = reference_weights(grid, maze.start, maze.end)
+    assert [w if path is not None else None for path, w in zip(corridor.paths, corridor.weight)] == expected
+    for path, start, weight in zip(corridor.paths, maze.start, corridor.weight):
+        if path is not None:
+            check_path(grid, path, start, maze.end, weight)
@@ -0,0 +1,45 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import server
+from generator import grid_to_data, write_json
+
+
+async def exchange(request):
+    # Avvia il servizio su una porta libera, invia la richiesta e legge la risposta fino alla chiusura
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        listener = await asyncio.start_server(server.SolveServer(executor).handle_connection, "127.0.0.1", 0)
+        async with listener:
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def post(body, length=None):
+    length = len(body) if length is None else length
+    return (f"POST /solve HTTP/1.1\r\nHost: localhost\r\nContent-Length: {length}\r\n"
+            f"Connection: close\r\n\r\n").encode("utf-8") + body
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "1e3", "²"])
+def test_invalid_content_length(length):
+    server.init_worker(1024 * 1024)
+    status, payload = asyncio.run(exchange(post(b"{}", length)))
+    assert status == 400 and "Content-Length" in payload["error"]
+
+
+def test_solve(tmp_path):
+    filepath = str(tmp_path / "labirinto.json")
+    write_json(grid_to_data(np.ones((4, 4), dtype=np.uint8), [(0, 0)], (3, 3)), filepath)
+    server.init_worker(1024 * 1024)
+    status, payload = asyncio.run(exchange(post(json.dumps({"maze": filepath}).encode())))
+    assert status == 200 and payload["weight"] == [6]